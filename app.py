@@ -1,54 +1,104 @@
 """Learnify - AI-Powered Teaching Assistant"""
 import os
+import re
 import uuid
+import hmac
 import json
+import hashlib
 import logging
-from flask import Flask, render_template, request, jsonify, Response, session
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, Response, send_file, stream_with_context
 from flask_cors import CORS
 from config import get_config
-from claude_client import ClaudeClient
-from teaching_agent import TeachingAgent
-from quiz_manager import QuizManager
-from session_manager import SessionManager
+from quiz_manager import Quiz, QuizCache
 from prompt_templates import InsightsPrompts
 from security import rate_limit, sanitize_input, validate_topic, validate_difficulty, add_security_headers
+from assets import init_assets
+from compression import compress_response
+from http_cache import PayloadCache, UncacheablePayload, conditional_response
+from exporter import FORMATS, export_sessions, parse_datetime
+from session_manager import canonical_topic
+from services import (
+    get_claude_client, get_followup_agent, get_pdf_exporter, get_quiz_manager, get_session_manager, get_teaching_agent
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
 config = get_config()
-app.secret_key = config.SECRET_KEY
-CORS(app)
-
-claude_client = ClaudeClient()
-teaching_agent = TeachingAgent(claude_client)
-quiz_manager = QuizManager(claude_client)
-session_manager = SessionManager()
+bp = Blueprint('main', __name__)
 
 teaching_content_store = {}
-quiz_store = {}
+quiz_store = QuizCache(max_size=config.QUIZ_CACHE_SIZE)
+payload_cache = PayloadCache(ttl=config.HTTP_CACHE_TTL)
+stream_stats = {'active': 0, 'peak': 0, 'total': 0}
+stream_stats_lock = threading.Lock()
+
+
+def track_stream(events):
+    """Count an SSE response as active until its generator finishes or the client disconnects."""
+    with stream_stats_lock:
+        stream_stats['active'] += 1
+        stream_stats['total'] += 1
+        stream_stats['peak'] = max(stream_stats['peak'], stream_stats['active'])
+    try:
+        yield from events
+    finally:
+        with stream_stats_lock:
+            stream_stats['active'] -= 1
+
+
+def load_quiz(session_id: str, fresh: bool = False):
+    """Return the live quiz for a session, rehydrating it from the database if this worker lacks it.
+
+    fresh=True re-reads the stored results, which other workers may have appended to.
+    """
+    quiz = None if fresh else quiz_store.get(session_id)
+    if quiz:
+        return quiz
+    quiz_data = get_session_manager().get_quiz_data(session_id)
+    if not quiz_data:
+        return None
+    quiz = Quiz.from_dict(quiz_data)
+    quiz_store.put(session_id, quiz)
+    return quiz
+
 
+def record_results(session_id: str, quiz: Quiz, results: list) -> tuple[Quiz, list]:
+    """Merge answers into the stored quiz and return the stored quiz and results.
 
-@app.after_request
+    Another worker may have answered a question first; the stored answer
+    wins, so the response and any completion use it rather than ours.
+    """
+    get_session_manager().record_quiz_results(session_id, [r.to_dict() for r in results])
+    stored = load_quiz(session_id, fresh=True) or quiz
+    return stored, [stored.get_result(r.question_id) or r for r in results]
+
+
+@bp.after_app_request
 def after_request(response):
-    return add_security_headers(response)
+    return compress_response(add_security_headers(response))
 
 
-@app.route('/')
+@bp.route('/')
 def index():
-    stats = session_manager.get_stats()
-    return render_template('index.html', stats=stats)
+    return conditional_response(
+        payload_cache, f"index-{current_app.config['BUILD_ID']}", get_session_manager().get_version(),
+        lambda: render_template('index.html', stats=get_session_manager().get_stats(),
+                                missed_concepts=get_session_manager().get_most_missed_concepts(limit=5)),
+        mimetype='text/html'
+    )
 
 
-@app.route('/teach')
+@bp.route('/teach')
 def teach_page():
     topic = request.args.get('topic', '')
     difficulty = request.args.get('difficulty', 'intermediate')
     return render_template('teaching.html', topic=topic, difficulty=difficulty)
 
 
-@app.route('/api/teach', methods=['POST'])
+@bp.route('/api/teach', methods=['POST'])
 @rate_limit
 def api_teach():
     data = request.get_json()
@@ -64,50 +114,112 @@ def api_teach():
         return jsonify({'error': error}), 400
 
     session_id = str(uuid.uuid4())
-    session_manager.create_session(session_id, topic, difficulty)
+    get_session_manager().create_session(session_id, topic, difficulty)
+    cached = get_session_manager().get_cached_content(topic, difficulty)
 
     def generate():
         content_parts = []
         try:
-            for chunk in teaching_agent.teach(topic, difficulty):
+            if cached and cached.teaching_content:
+                chunks = [cached.teaching_content]
+            else:
+                chunks = get_teaching_agent().teach(topic, difficulty)
+            for chunk in chunks:
                 content_parts.append(chunk)
                 yield f"data: {json.dumps({'content': chunk})}\n\n"
 
             full_content = ''.join(content_parts)
             teaching_content_store[session_id] = full_content
-            session_manager.update_teaching_content(session_id, full_content)
+            get_session_manager().update_teaching_content(session_id, full_content)
             yield f"data: {json.dumps({'done': True, 'session_id': session_id})}\n\n"
         except Exception as e:
             logger.error(f"Teaching error: {e}")
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
-    return Response(generate(), mimetype='text/event-stream',
+    return Response(track_stream(generate()), mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/api/followup/<session_id>', methods=['GET'])
+def api_followup_history(session_id):
+    return jsonify(get_session_manager().get_followup_thread(session_id))
+
+
+@bp.route('/api/followup/<session_id>', methods=['POST'])
+@rate_limit
+def api_followup(session_id):
+    data = request.get_json(silent=True) or {}
+    # Free text, not a topic: sent to the model as JSON and shown via textContent, so not HTML-escaped
+    question = str(data.get('question') or '').strip()[:config.FOLLOWUP_MAX_QUESTION_CHARS]
+    if not question:
+        return jsonify({'error': 'Question is required'}), 400
+
+    db_session = get_session_manager().get_session(session_id, fresh=True)
+    lesson = teaching_content_store.get(session_id) or (db_session.teaching_content if db_session else None)
+    if not db_session or not lesson:
+        return jsonify({'error': 'Session not found'}), 404
+
+    topic, difficulty = db_session.topic, db_session.difficulty
+    thread = get_session_manager().get_followup_thread(session_id)
+
+    def generate():
+        answer_parts = []
+        try:
+            agent = get_followup_agent()
+            for chunk in agent.stream_answer(topic, difficulty, lesson, thread, question):
+                answer_parts.append(chunk)
+                yield f"data: {json.dumps({'content': chunk})}\n\n"
+
+            # Append to the stored thread, not our copy: another tab may have added to it meanwhile
+            stored = get_session_manager().append_followup_exchange(session_id, question, ''.join(answer_parts))
+            yield f"data: {json.dumps({'done': True, 'compacted_turns': stored['compacted_turns']})}\n\n"
+        except Exception as e:
+            logger.error(f"Follow-up error: {e}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+
+        # After 'done', so the learner isn't kept waiting on the summary round trip
+        compaction = agent.compaction(topic, stored)
+        if compaction:
+            summary, folded = compaction
+            try:
+                get_session_manager().compact_followup_thread(session_id, summary, folded, stored['compacted_turns'])
+            except Exception as e:
+                logger.error(f"Error saving compacted follow-up history: {e}")
+
+    return Response(track_stream(generate()), mimetype='text/event-stream',
                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
-@app.route('/quiz/<session_id>')
+@bp.route('/quiz/<session_id>')
 def quiz_page(session_id):
     return render_template('quiz.html', session_id=session_id)
 
 
-@app.route('/api/quiz/generate/<session_id>', methods=['POST'])
+@bp.route('/api/quiz/generate/<session_id>', methods=['POST'])
 @rate_limit
 def api_generate_quiz(session_id):
     try:
-        content = teaching_content_store.get(session_id)
-        if not content:
-            db_session = session_manager.get_session(session_id)
-            if db_session and db_session.teaching_content:
-                content = db_session.teaching_content
+        quiz = load_quiz(session_id)
+        if not quiz:
+            db_session = get_session_manager().get_session(session_id, fresh=True)
+            content = teaching_content_store.get(session_id)
+            if not content:
+                if db_session and db_session.teaching_content:
+                    content = db_session.teaching_content
+                else:
+                    return jsonify({'error': 'Session not found'}), 404
+
+            topic = db_session.topic if db_session else "General Topic"
+            difficulty = db_session.difficulty if db_session else "intermediate"
+
+            cached = get_session_manager().get_cached_content(topic, difficulty)
+            if cached and cached.quiz_data and cached.teaching_content == content:
+                quiz = get_quiz_manager().load_quiz(topic, cached.quiz_data)
             else:
-                return jsonify({'error': 'Session not found'}), 404
-
-        db_session = session_manager.get_session(session_id)
-        topic = db_session.topic if db_session else "General Topic"
-        difficulty = db_session.difficulty if db_session else "intermediate"
-
-        quiz = quiz_manager.generate_quiz(topic, content, num_questions=4, difficulty=difficulty)
-        quiz_store[session_id] = quiz
+                quiz = get_quiz_manager().generate_quiz(topic, content, num_questions=4, difficulty=difficulty)
+            get_session_manager().save_quiz(session_id, quiz.to_dict())
+            quiz_store.put(session_id, quiz)
 
         questions_data = [
             {
@@ -125,11 +237,11 @@ def api_generate_quiz(session_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/quiz/submit/<session_id>', methods=['POST'])
+@bp.route('/api/quiz/submit/<session_id>', methods=['POST'])
 @rate_limit
 def api_submit_answer(session_id):
     try:
-        quiz = quiz_store.get(session_id)
+        quiz = load_quiz(session_id)
         if not quiz:
             return jsonify({'error': 'Quiz not found'}), 404
 
@@ -137,7 +249,8 @@ def api_submit_answer(session_id):
         question_id = data.get('question_id')
         selected_option = data.get('selected_option')
 
-        result = quiz_manager.submit_answer(quiz, question_id, selected_option)
+        result = get_quiz_manager().submit_answer(quiz, question_id, selected_option)
+        quiz, (result,) = record_results(session_id, quiz, [result])
 
         return jsonify({
             'is_correct': result.is_correct,
@@ -152,16 +265,62 @@ def api_submit_answer(session_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/quiz/complete/<session_id>', methods=['POST'])
+@bp.route('/api/quiz/grade/<session_id>', methods=['POST'])
+@rate_limit
+def api_grade_quiz(session_id):
+    try:
+        quiz = load_quiz(session_id)
+        if not quiz:
+            return jsonify({'error': 'Quiz not found'}), 404
+
+        data = request.get_json(silent=True) or {}
+        answers = data.get('answers')
+        if not isinstance(answers, list) or not all(isinstance(a, dict) for a in answers):
+            return jsonify({'error': 'answers must be a list of {question_id, selected_option}'}), 400
+
+        results = get_quiz_manager().grade_answers(quiz, answers)
+        quiz, results = record_results(session_id, quiz, results)
+        analysis = get_quiz_manager().get_performance_analysis(quiz)
+        if quiz.is_complete:
+            get_session_manager().update_quiz_results(
+                session_id, quiz.to_dict(), quiz.score, quiz.total
+            )
+
+        return jsonify({
+            'results': [
+                {
+                    'question_id': r.question_id,
+                    'selected_option': r.selected_option_id,
+                    'is_correct': r.is_correct,
+                    'feedback': r.feedback,
+                    'understanding': r.understanding,
+                    'concept_tested': r.concept_tested
+                }
+                for r in results
+            ],
+            'score': quiz.score,
+            'total': quiz.total,
+            'percentage': quiz.percentage,
+            'complete': quiz.is_complete,
+            'analysis': analysis
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Grade error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/quiz/complete/<session_id>', methods=['POST'])
 @rate_limit
 def api_complete_quiz(session_id):
     try:
-        quiz = quiz_store.get(session_id)
+        quiz = load_quiz(session_id, fresh=True)
         if not quiz:
             return jsonify({'error': 'Quiz not found'}), 404
 
-        analysis = quiz_manager.get_performance_analysis(quiz)
-        session_manager.update_quiz_results(
+        analysis = get_quiz_manager().get_performance_analysis(quiz)
+        get_session_manager().update_quiz_results(
             session_id, quiz.to_dict(), quiz.score, quiz.total
         )
 
@@ -176,10 +335,10 @@ def api_complete_quiz(session_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/results/<session_id>')
+@bp.route('/results/<session_id>')
 def results_page(session_id):
     quiz = quiz_store.get(session_id)
-    db_session = session_manager.get_session(session_id)
+    db_session = get_session_manager().get_session(session_id, fresh=True)
 
     if not quiz and not db_session:
         return render_template('404.html'), 404
@@ -189,26 +348,40 @@ def results_page(session_id):
                           topic=db_session.topic if db_session else "Topic")
 
 
-@app.route('/api/insights/<session_id>')
+def generate_insights(quiz: Quiz) -> str:
+    commonly_missed = [s['concept'] for s in get_session_manager().get_concept_stats(quiz.topic, limit=3)
+                       if s['misses']]
+    prompt = InsightsPrompts.get_insights_prompt(
+        quiz.topic, quiz.score, quiz.total, quiz.get_wrong_concepts(), commonly_missed
+    )
+    return get_claude_client().generate_insights(InsightsPrompts.SYSTEM_PROMPT, prompt)
+
+
+@bp.route('/api/insights/<session_id>')
 @rate_limit
 def api_get_insights(session_id):
     try:
-        quiz = quiz_store.get(session_id)
-        db_session = session_manager.get_session(session_id)
+        completed_at = get_session_manager().get_completed_at(session_id, fresh=True)
+        if completed_at:
+            def build():
+                quiz = load_quiz(session_id, fresh=True)
+                insights = generate_insights(quiz)
+                if insights == InsightsPrompts.UNAVAILABLE_MESSAGE:
+                    raise UncacheablePayload(json.dumps({'insights': insights}))
+                return json.dumps({'insights': insights})
+
+            return conditional_response(
+                payload_cache, f'insights-{session_id}', int(completed_at.timestamp()), build
+            )
+
+        quiz = load_quiz(session_id)
+        db_session = get_session_manager().get_session(session_id, fresh=True)
 
         if not quiz and not db_session:
             return jsonify({'error': 'Session not found'}), 404
 
         if quiz:
-            topic = db_session.topic if db_session else "Topic"
-            wrong_concepts = quiz.get_wrong_concepts()
-            prompt = InsightsPrompts.get_insights_prompt(
-                topic, quiz.score, quiz.total, wrong_concepts
-            )
-            insights = claude_client.generate_insights(
-                InsightsPrompts.SYSTEM_PROMPT, prompt
-            )
-            return jsonify({'insights': insights})
+            return jsonify({'insights': generate_insights(quiz)})
         else:
             return jsonify({'insights': 'Complete the quiz to see personalized insights.'})
     except Exception as e:
@@ -216,38 +389,154 @@ def api_get_insights(session_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/history')
+@bp.route('/api/export/sessions')
+@rate_limit
+def api_export_sessions():
+    if not config.EXPORT_TOKEN:
+        # Disabled unless a token is configured; export_sessions.py works without one
+        return jsonify({'error': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                               f"Bearer {config.EXPORT_TOKEN}".encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(FORMATS)}"}), 400
+    try:
+        since = parse_datetime(request.args.get('since'))
+        until = parse_datetime(request.args.get('until'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    include_content = request.args.get('include_content') == '1'
+    include_results = request.args.get('include_results') == '1'
+    rows = get_session_manager().iter_sessions(since, until, include_content=include_content,
+                                               include_results=include_results)
+    body = export_sessions(rows, fmt, include_content, include_results)
+    return Response(stream_with_context(body), mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename=learnify-sessions.{fmt}',
+        'Cache-Control': 'no-store',
+    })
+
+
+@bp.route('/api/export/<session_id>.pdf')
+@rate_limit
+def api_export_pdf(session_id):
+    try:
+        db_session = get_session_manager().get_session(session_id, fresh=True)
+        if not db_session or not db_session.teaching_content:
+            return jsonify({'error': 'Session not found'}), 404
+
+        path = get_pdf_exporter().get_pdf(
+            session_id, db_session.topic, db_session.difficulty,
+            db_session.teaching_content, db_session.quiz_data
+        )
+        slug = re.sub(r'[^a-z0-9]+', '-', db_session.topic.lower()).strip('-') or 'lesson'
+        return send_file(path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"learnify-{slug}.pdf", max_age=3600)
+    except FutureTimeoutError:
+        return jsonify({'error': 'PDF rendering timed out, please retry'}), 503
+    except Exception as e:
+        logger.error(f"PDF export error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/history')
 def history_page():
     return render_template('history.html')
 
 
-@app.route('/api/history')
+@bp.route('/api/history')
 def api_history():
     try:
-        history = session_manager.get_history(limit=20)
-        stats = session_manager.get_stats()
-        return jsonify({'sessions': history, 'stats': stats})
+        return conditional_response(
+            payload_cache, 'history', get_session_manager().get_version(),
+            lambda: json.dumps({
+                'sessions': get_session_manager().get_history(limit=20),
+                'stats': get_session_manager().get_stats()
+            })
+        )
     except Exception as e:
         logger.error(f"History error: {e}")
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/usage')
+@bp.route('/api/analytics/concepts')
+def api_concept_analytics():
+    topic = sanitize_input(request.args.get('topic', ''))
+    difficulty = request.args.get('difficulty')
+    if not topic:
+        return jsonify({'error': 'Topic is required'}), 400
+    if difficulty:
+        valid, error = validate_difficulty(difficulty)
+        if not valid:
+            return jsonify({'error': error}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'Limit must be a number'}), 400
+
+    try:
+        return conditional_response(
+            payload_cache,
+            f"concepts-{hashlib.sha1(canonical_topic(topic).encode('utf-8')).hexdigest()[:12]}-{difficulty}-{limit}",
+            get_session_manager().get_version(),
+            lambda: json.dumps({
+                'topic': topic,
+                'difficulty': difficulty,
+                'concepts': get_session_manager().get_concept_stats(topic, difficulty, limit=limit)
+            })
+        )
+    except Exception as e:
+        logger.error(f"Concept analytics error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/usage')
 def api_usage():
-    return jsonify(claude_client.get_usage_stats())
+    return jsonify(get_claude_client().get_usage_stats())
+
 
+@bp.route('/api/metrics')
+def api_metrics():
+    with stream_stats_lock:
+        streams = dict(stream_stats)
+    return jsonify({
+        'pid': os.getpid(),
+        'streams': streams,
+        'database': get_session_manager().get_pool_stats(),
+        'upstream': {
+            'usage': get_claude_client().get_usage_stats(),
+            'connections': get_claude_client().get_connection_stats(),
+        } if get_claude_client.initialized else None
+    })
 
-@app.errorhandler(404)
+
+@bp.app_errorhandler(404)
 def not_found(e):
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def server_error(e):
     return render_template('500.html'), 500
 
 
+def create_app(config_object=None) -> Flask:
+    """Build the Flask app. Subsystems (database, Claude client) initialize on first use."""
+    app = Flask(__name__)
+    app.config.from_object(config_object or config)
+    CORS(app)
+    init_assets(app)
+    app.register_blueprint(bp)
+    return app
+
+
+app = create_app()
+
+
 if __name__ == '__main__':
+    get_session_manager().create_schema()
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
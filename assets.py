@@ -0,0 +1,78 @@
+"""Fingerprinted static asset serving for Learnify"""
+import os
+import json
+import hashlib
+import logging
+import mimetypes
+from flask import Flask, request, send_from_directory, url_for, abort
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(dist_dir: str) -> dict:
+    try:
+        with open(os.path.join(dist_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.info("No asset manifest found; serving unversioned static files")
+        return {}
+
+
+def build_id(manifest: dict, template_folder: str) -> str:
+    """Short hash of the asset manifest and templates; changes with any deploy that changes the HTML."""
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8'))
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, template_folder).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def init_assets(app: Flask) -> None:
+    """Register /assets/, the asset_url() template helper and app.config['BUILD_ID'].
+
+    Without a build (python build_assets.py) asset_url() falls back to the
+    regular /static/ URLs, so development needs no extra step. BUILD_ID goes
+    into the ETag of cached HTML, so pages that link fingerprinted assets are
+    not revalidated across a deploy that replaced them.
+    """
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    manifest = load_manifest(dist_dir)
+    hashed_names = set(manifest.values())
+    app.config['BUILD_ID'] = build_id(manifest, os.path.join(app.root_path, app.template_folder))
+
+    def asset_url(name: str) -> str:
+        hashed = manifest.get(name)
+        if hashed:
+            return url_for('assets', filename=hashed)
+        return url_for('static', filename=name)
+
+    def serve_asset(filename):
+        path = os.path.join(dist_dir, filename)
+        if filename not in hashed_names or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if accepted[encoding] and os.path.isfile(path + suffix):
+                response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype,
+                                               max_age=IMMUTABLE_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(dist_dir, filename, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,39 @@
+"""Backfill concept_stats from completed learning sessions
+
+Quizzes completed after the rollup was introduced are counted as they
+finish; this counts the ones completed before. Each session is marked as
+it is counted, so the job is safe to re-run or interrupt:
+
+    python backfill_concepts.py
+"""
+import sys
+import logging
+import argparse
+from services import get_session_manager
+
+logger = logging.getLogger('backfill_concepts')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Roll up concept attempts and misses from completed sessions.')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    session_manager = get_session_manager()
+    scanned = rolled_up = last_id = 0
+    while True:
+        batch = session_manager.get_completed_session_ids(after_id=last_id, limit=args.batch_size)
+        if not batch:
+            break
+        for last_id, session_id in batch:
+            rolled_up += session_manager.roll_up_session(session_id)
+        scanned += len(batch)
+        logger.info(f"Scanned {scanned} completed sessions, rolled up {rolled_up}")
+
+    print(f"Rolled up {rolled_up} of {scanned} completed sessions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
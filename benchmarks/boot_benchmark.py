@@ -0,0 +1,96 @@
+"""Import-time and boot-time benchmark for Learnify
+
+Each sample runs in a fresh interpreter, so nothing is shared between runs:
+
+    python benchmarks/boot_benchmark.py                       # print results
+    python benchmarks/boot_benchmark.py --save-baseline       # record a baseline
+    python benchmarks/boot_benchmark.py --compare             # fail on >20% regression
+
+`import_s` is the time to import the app module. `boot_s` adds the
+first static page and the first database-backed API request, i.e. what a
+freshly forked worker pays before it can serve traffic.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'boot_baseline.json')
+
+PROBE = r'''
+import sys, time, json
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+assert client.get('/history').status_code == 200
+assert client.get('/api/history').status_code == 200
+t2 = time.perf_counter()
+print(json.dumps({
+    'import_s': t1 - t0,
+    'boot_s': t2 - t0,
+    'anthropic_imported': 'anthropic' in sys.modules,
+}))
+'''
+
+
+def sample(env: dict) -> dict:
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(samples: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.pop('ANTHROPIC_API_KEY', None)
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        subprocess.run([sys.executable, 'migrate.py'], cwd=ROOT, env=env,
+                       capture_output=True, check=True)
+        results = [sample(env) for _ in range(samples)]
+
+    return {
+        'samples': samples,
+        'import_s': round(statistics.median(r['import_s'] for r in results), 4),
+        'boot_s': round(statistics.median(r['boot_s'] for r in results), 4),
+        'anthropic_imported': any(r['anthropic_imported'] for r in results),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='Exit non-zero on regression')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown ratio')
+    args = parser.parse_args(argv)
+
+    result = run(args.samples)
+    print(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+        return 0
+
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{key}: {baseline[key]:.4f}s -> {result[key]:.4f}s"
+            for key in ('import_s', 'boot_s')
+            if result[key] > baseline[key] * (1 + args.threshold)
+        ]
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
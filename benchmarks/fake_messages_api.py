@@ -0,0 +1,255 @@
+"""Local fake of the Anthropic Messages API for load tests
+
+Answers POST /v1/messages, streaming or not, with canned lessons, quizzes
+and insights shaped like the real prompts expect. Latency and failures are
+configurable so the app can be measured without spending tokens:
+
+    python benchmarks/fake_messages_api.py --port 8089 --ttft 0.4 --tokens-per-second 80 \\
+        --error-rate 0.01 --rate-limit-rate 0.02
+
+Point the app at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8089 and any
+ANTHROPIC_API_KEY. GET /stats returns request, failure and concurrency counts.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LESSON_WORDS = (
+    "Think of it this way: every idea rests on a simpler one, and the aha moment "
+    "comes when you see which one. Start from the concrete case, then generalize."
+).split()
+
+
+@dataclass
+class FakeSettings:
+    ttft: float = 0.3
+    tokens_per_second: float = 100.0
+    lesson_tokens: int = 300
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 0.5
+    seed: int = 0
+
+
+def _quiz(num_questions: int = 4) -> dict:
+    questions = []
+    for number in range(1, num_questions + 1):
+        questions.append({
+            'id': number,
+            'question': f"Which statement about idea {number} is right?",
+            'concept_tested': f"Concept {number}",
+            'options': [
+                {'id': option, 'text': f"Option {option}", 'is_correct': option == 'B',
+                 'feedback': 'Right.' if option == 'B' else 'Not quite.',
+                 'understanding': 'Solid grasp.' if option == 'B' else 'Mixes up the basics.'}
+                for option in 'ABCD'
+            ],
+        })
+    return {'questions': questions}
+
+
+class FakeMessagesServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings: FakeSettings):
+        super().__init__(address, FakeMessagesHandler)
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'streams': 0, 'rate_limited': 0, 'errors': 0,
+            'active_streams': 0, 'peak_streams': 0, 'output_tokens': 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: FakeMessagesServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, error_type: str, headers: dict = None) -> None:
+        self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': 'injected'}}, headers)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.snapshot())
+        else:
+            self._send_error(404, 'not_found_error')
+
+    def do_POST(self):
+        if not self.path.startswith('/v1/messages'):
+            self._send_error(404, 'not_found_error')
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        settings = self.server.settings
+        self.server.count('requests')
+
+        roll = self.server.roll()
+        if roll < settings.rate_limit_rate:
+            self.server.count('rate_limited')
+            self._send_error(429, 'rate_limit_error', {'retry-after': str(settings.retry_after)})
+            return
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            self.server.count('errors')
+            self._send_error(529, 'overloaded_error')
+            return
+
+        tokens = self._completion(body)
+        self.server.count('output_tokens', len(tokens))
+        if body.get('stream'):
+            self._stream(body, tokens)
+        else:
+            time.sleep(settings.ttft + len(tokens) / settings.tokens_per_second)
+            self._send_json(200, self._message(body, ''.join(tokens), len(tokens)))
+
+    def _completion(self, body: dict) -> list[str]:
+        system = body.get('system') or ''
+        if isinstance(system, list):
+            system = ' '.join(block.get('text', '') for block in system)
+        if 'assessment designer' in system:
+            return [json.dumps(_quiz())]
+        if 'learning analytics' in system:
+            return ["You did well. ", "Review the concepts you missed, ", "then try a harder level."]
+        if 'condense tutoring' in system:
+            return ["The learner asked about the core idea and an edge case; both were explained."]
+        if 'follow-up questions' in system:
+            return [LESSON_WORDS[i % len(LESSON_WORDS)] + ' ' for i in range(80)]
+        words = [LESSON_WORDS[i % len(LESSON_WORDS)] + ' ' for i in range(self.server.settings.lesson_tokens)]
+        return ['## Lesson\n\n'] + words
+
+    @staticmethod
+    def _message(body: dict, text: str, output_tokens: int) -> dict:
+        return {
+            'id': 'msg_fake', 'type': 'message', 'role': 'assistant', 'model': body.get('model', 'fake'),
+            'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+            'usage': {'input_tokens': len(json.dumps([body.get('system'), body.get('messages', [])])) // 4,
+                      'output_tokens': output_tokens},
+        }
+
+    def _event(self, name: str, data: dict) -> None:
+        chunk = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.flush()
+
+    def _stream(self, body: dict, tokens: list[str]) -> None:
+        settings = self.server.settings
+        with self.server.lock:
+            self.server.stats['streams'] += 1
+            self.server.stats['active_streams'] += 1
+            self.server.stats['peak_streams'] = max(self.server.stats['peak_streams'],
+                                                    self.server.stats['active_streams'])
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            message = self._message(body, '', 0)
+            message['content'] = []
+            self._event('message_start', {'type': 'message_start', 'message': message})
+            self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                'content_block': {'type': 'text', 'text': ''}})
+            time.sleep(settings.ttft)
+            interval = 1 / settings.tokens_per_second
+            for token in tokens:
+                self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                    'delta': {'type': 'text_delta', 'text': token}})
+                time.sleep(interval)
+            self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            self._event('message_delta', {'type': 'message_delta',
+                                          'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                          'usage': {'output_tokens': len(tokens)}})
+            self._event('message_stop', {'type': 'message_stop'})
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            self.server.count('active_streams', -1)
+
+
+def start_server(settings: FakeSettings, host: str = '127.0.0.1', port: int = 0) -> FakeMessagesServer:
+    """Start the fake server on a background thread; port 0 picks a free port."""
+    server = FakeMessagesServer((host, port), settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeSettings()
+    parser.add_argument('--ttft', type=float, default=defaults.ttft, help='Seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=defaults.tokens_per_second)
+    parser.add_argument('--lesson-tokens', type=int, default=defaults.lesson_tokens)
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate,
+                        help='Fraction of requests answered with 529 overloaded')
+    parser.add_argument('--rate-limit-rate', type=float, default=defaults.rate_limit_rate,
+                        help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, default=defaults.retry_after)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def settings_from_args(args: argparse.Namespace) -> FakeSettings:
+    return FakeSettings(
+        ttft=args.ttft, tokens_per_second=args.tokens_per_second, lesson_tokens=args.lesson_tokens,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, seed=args.seed,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeMessagesServer((args.host, args.port), settings_from_args(args))
+    print(f"Fake Messages API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
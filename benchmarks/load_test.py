@@ -0,0 +1,380 @@
+"""End-to-end load test for Learnify against a fake Messages API
+
+Starts the fake upstream (benchmarks/fake_messages_api.py) and an app
+server on a scratch SQLite database, then runs learner journeys at the
+given concurrency:
+
+    teach (SSE) -> quiz generate -> submit x4 -> complete -> insights -> history
+
+    python benchmarks/load_test.py --journeys 200 --concurrency 20
+    python benchmarks/load_test.py --server flask --rate-limit-rate 0.05
+    python benchmarks/load_test.py --save-baseline
+    python benchmarks/load_test.py --compare           # fail on >20% regression
+
+Reports p50/p95/p99 per endpoint, time to first SSE event, streams and
+database time per worker (sampled from /api/metrics) and upstream counts.
+`--url` drives an already running app instead; it must point at an
+upstream you are happy to spend tokens on.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_messages_api import add_arguments, settings_from_args, start_server  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'load_baseline.json')
+TOPICS = [
+    'Recursion', 'Photosynthesis', 'Supply and demand', 'Bayes theorem', 'TCP handshakes',
+    'Plate tectonics', 'Big O notation', 'The French Revolution', 'Eigenvectors', 'Hash tables',
+]
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values: list[float]) -> dict:
+    return {f"p{p}_ms": round(percentile(values, p) * 1000, 1) if values else None for p in (50, 95, 99)}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.ttfb = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def record_ttfb(self, seconds: float) -> None:
+        with self._lock:
+            self.ttfb.append(seconds)
+
+    def endpoints(self) -> dict:
+        return {
+            name: {'count': len(values), 'errors': self.errors[name], **summarize(values)}
+            for name, values in sorted(self.latencies.items())
+        }
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+class AppClient:
+    def __init__(self, base_url: str, timeout: float = 120):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def call(self, method: str, path: str, body: Optional[dict] = None) -> tuple[int, bytes]:
+        conn = self._connection()
+        try:
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def stream(self, path: str, body: dict):
+        """Yield (seconds since request, event dict) for each SSE data line."""
+        conn = self._connection()
+        start = time.perf_counter()
+        try:
+            conn.request('POST', path, body=json.dumps(body), headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            if response.status != 200:
+                raise JourneyFailed(f"{path} returned {response.status}")
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if line.startswith(b'data: '):
+                    yield time.perf_counter() - start, json.loads(line[6:])
+        finally:
+            conn.close()
+
+
+def run_journey(client: AppClient, recorder: Recorder, rng: random.Random) -> None:
+    def timed(endpoint: str, method: str, path: str, body: Optional[dict] = None) -> dict:
+        start = time.perf_counter()
+        try:
+            status, data = client.call(method, path, body)
+        except OSError as e:
+            recorder.record(endpoint, time.perf_counter() - start, ok=False)
+            raise JourneyFailed(f"{endpoint}: {e}")
+        recorder.record(endpoint, time.perf_counter() - start, ok=status < 400)
+        if status >= 400:
+            raise JourneyFailed(f"{endpoint} returned {status}")
+        return json.loads(data) if data else {}
+
+    session_id, first = None, True
+    start = time.perf_counter()
+    try:
+        for elapsed, event in client.stream('/api/teach', {
+            'topic': rng.choice(TOPICS), 'difficulty': rng.choice(DIFFICULTIES)
+        }):
+            if first and 'content' in event:
+                recorder.record_ttfb(elapsed)
+                first = False
+            if 'error' in event:
+                raise JourneyFailed(f"teach: {event['error']}")
+            session_id = event.get('session_id', session_id)
+    except (JourneyFailed, OSError):
+        recorder.record('teach', time.perf_counter() - start, ok=False)
+        raise
+    recorder.record('teach', time.perf_counter() - start, ok=session_id is not None)
+    if not session_id:
+        raise JourneyFailed('teach stream ended without a session id')
+
+    quiz = timed('quiz_generate', 'POST', f'/api/quiz/generate/{session_id}')
+    for question in quiz['questions']:
+        timed('quiz_submit', 'POST', f'/api/quiz/submit/{session_id}', {
+            'question_id': question['id'],
+            'selected_option': rng.choice(question['options'])['id'],
+        })
+    timed('quiz_complete', 'POST', f'/api/quiz/complete/{session_id}')
+    timed('insights', 'GET', f'/api/insights/{session_id}')
+    timed('history', 'GET', '/api/history')
+
+
+class MetricsSampler(threading.Thread):
+    """Polls /api/metrics; each poll lands on whichever worker accepts it."""
+
+    def __init__(self, client: AppClient, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.client = client
+        self.interval = interval
+        self.first = {}
+        self.last = {}
+        self.peak_streams = defaultdict(int)
+        self._done = threading.Event()
+
+    def sample(self) -> None:
+        try:
+            status, data = self.client.call('GET', '/api/metrics')
+        except OSError:
+            return
+        if status != 200:
+            return
+        metrics = json.loads(data)
+        pid = metrics['pid']
+        self.first.setdefault(pid, metrics)
+        self.last[pid] = metrics
+        self.peak_streams[pid] = max(self.peak_streams[pid], metrics['streams']['active'])
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+        self.sample()
+
+    def workers(self, baseline_pids: set) -> dict:
+        def totals(metrics: Optional[dict]) -> tuple[int, float, int]:
+            if not metrics:
+                return 0, 0.0, 0
+            pools = metrics['database'].values()
+            return (sum(p['queries'] for p in pools), sum(p['query_ms'] for p in pools),
+                    metrics['streams']['total'])
+
+        workers = {}
+        for pid, last in self.last.items():
+            # Workers first seen mid-run started from zero
+            first = self.first[pid] if pid in baseline_pids else None
+            queries, query_ms, streams = (a - b for a, b in zip(totals(last), totals(first)))
+            workers[str(pid)] = {
+                'streams': streams,
+                'peak_concurrent_streams': self.peak_streams[pid],
+                'db_queries': queries,
+                'db_ms': round(query_ms, 1),
+                'pool_timeouts': sum(p['timeouts'] for p in last['database'].values()),
+            }
+        return workers
+
+
+def wait_until_up(client: AppClient, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App server exited with {process.returncode}")
+        try:
+            if client.call('GET', '/api/metrics')[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('App server did not start in time')
+
+
+def start_app(args, upstream_url: str, tmp: str) -> tuple[subprocess.Popen, str]:
+    port = args.port
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        'ANTHROPIC_BASE_URL': upstream_url,
+        'ANTHROPIC_API_KEY': 'fake-key',
+        'RATE_LIMIT_PER_MINUTE': '0',
+        'EXPORT_CACHE_DIR': os.path.join(tmp, 'exports'),
+    })
+    env.pop('DATABASE_READ_URL', None)
+    subprocess.run([sys.executable, 'migrate.py'], cwd=ROOT, env=env, capture_output=True, check=True)
+
+    if args.server == 'gunicorn':
+        env.update({
+            'GUNICORN_BIND': f"127.0.0.1:{port}",
+            'GUNICORN_WORKERS': str(args.workers),
+            'GUNICORN_THREADS': str(args.threads),
+        })
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    else:
+        env['PORT'] = str(port)
+        command = [sys.executable, 'app.py']
+    log = open(os.path.join(tmp, 'server.log'), 'wb')
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        process, upstream = None, None
+        base_url = args.url
+        if not base_url:
+            upstream = start_server(settings_from_args(args))
+            process, base_url = start_app(args, upstream.base_url, tmp)
+        try:
+            client = AppClient(base_url)
+            if process:
+                wait_until_up(client, process)
+
+            sampler = MetricsSampler(client)
+            for _ in range(max(4, args.workers * 4)):
+                sampler.sample()
+            baseline_pids = set(sampler.first)
+            sampler.start()
+
+            recorder = Recorder()
+            failures = []
+            seeds = random.Random(args.seed)
+
+            def journey(seed: int) -> None:
+                try:
+                    run_journey(client, recorder, random.Random(seed))
+                except (JourneyFailed, OSError) as e:
+                    failures.append(str(e))
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                list(pool.map(journey, [seeds.random() for _ in range(args.journeys)]))
+            duration = time.perf_counter() - start
+            sampler.stop()
+        finally:
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+            if upstream:
+                upstream.shutdown()
+
+    workers = sampler.workers(baseline_pids)
+    completed = args.journeys - len(failures)
+    return {
+        'journeys': args.journeys,
+        'concurrency': args.concurrency,
+        'failed_journeys': len(failures),
+        'failure_samples': sorted(set(failures))[:5],
+        'duration_s': round(duration, 2),
+        'journeys_per_s': round(completed / duration, 2) if duration else None,
+        'endpoints': recorder.endpoints(),
+        'sse_ttfb': summarize(recorder.ttfb),
+        'workers': workers,
+        'db_ms_per_journey': round(sum(w['db_ms'] for w in workers.values()) / completed, 2) if completed else None,
+        'upstream': upstream.snapshot() if upstream else None,
+    }
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> list[str]:
+    found = []
+
+    def slower(name: str, current: Optional[float], before: Optional[float]) -> None:
+        if current is not None and before and current > before * (1 + threshold):
+            found.append(f"{name}: {before}ms -> {current}ms")
+
+    for endpoint, stats in result['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint, {})
+        for key in ('p95_ms', 'p99_ms'):
+            slower(f"{endpoint} {key}", stats[key], before.get(key))
+    slower('sse_ttfb p95_ms', result['sse_ttfb']['p95_ms'], baseline.get('sse_ttfb', {}).get('p95_ms'))
+
+    if baseline.get('journeys_per_s') and result['journeys_per_s'] is not None \
+            and result['journeys_per_s'] < baseline['journeys_per_s'] * (1 - threshold):
+        found.append(f"journeys_per_s: {baseline['journeys_per_s']} -> {result['journeys_per_s']}")
+    if result['failed_journeys'] > baseline.get('failed_journeys', 0):
+        found.append(f"failed_journeys: {baseline.get('failed_journeys', 0)} -> {result['failed_journeys']}")
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--journeys', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--url', help='Drive an already running app instead of starting one')
+    parser.add_argument('--server', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='Exit non-zero on regression')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown ratio')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+        return 0
+
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(result, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Build fingerprinted, pre-compressed static assets for Learnify
+
+Copies static/css/*.css and static/js/*.js to static/dist/ under
+content-hashed names, writes .gz (and .br when Brotli is installed)
+siblings, and records the mapping in static/dist/manifest.json for
+assets.asset_url() to resolve.
+
+    python build_assets.py
+"""
+import os
+import sys
+import glob
+import gzip
+import json
+import shutil
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+SOURCES = ('css/*.css', 'js/*.js')
+
+
+def fingerprint(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> dict:
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for pattern in SOURCES:
+        for source in sorted(glob.glob(os.path.join(static_dir, pattern))):
+            name = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{fingerprint(source)}{ext}"
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(source, 'rb') as f:
+                data = f.read()
+            with open(target, 'wb') as f:
+                f.write(data)
+            with open(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli:
+                with open(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+            manifest[name] = hashed
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == '__main__':
+    manifest = build()
+    for name, hashed in manifest.items():
+        print(f"{name} -> dist/{hashed}")
+    if not brotli:
+        print("Brotli not installed; only gzip variants written", file=sys.stderr)
@@ -1,23 +1,50 @@
 """Claude API Client for Learnify"""
 import anthropic
+import threading
 from typing import Generator, Optional
 import logging
 from config import get_config
+from http_pool import ConnectionMetrics, ConnectionWarmer, build_http_client
+from prompt_templates import InsightsPrompts
 
 logger = logging.getLogger(__name__)
 
 class ClaudeClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_retries: Optional[int] = None):
         config = get_config()
         self.api_key = api_key or config.ANTHROPIC_API_KEY
         if not self.api_key:
             raise ValueError("Anthropic API key is required")
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.connection_metrics = ConnectionMetrics()
+        http_client = build_http_client(config, self.connection_metrics)
+        self.client = anthropic.Anthropic(
+            api_key=self.api_key,
+            base_url=base_url or config.ANTHROPIC_BASE_URL,
+            max_retries=config.ANTHROPIC_MAX_RETRIES if max_retries is None else max_retries,
+            http_client=http_client
+        )
+        self.warmer = ConnectionWarmer(
+            http_client, str(self.client.base_url), self.connection_metrics,
+            connections=config.ANTHROPIC_WARM_CONNECTIONS, interval=config.ANTHROPIC_KEEPALIVE_INTERVAL
+        )
         self.default_model = config.DEFAULT_MODEL
         self.max_tokens_teaching = config.MAX_TOKENS_TEACHING
         self.max_tokens_quiz = config.MAX_TOKENS_QUIZ
+        self.max_tokens_followup = config.MAX_TOKENS_FOLLOWUP
+        self.max_tokens_summary = config.MAX_TOKENS_SUMMARY
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_read_tokens = 0
+        self.total_cache_creation_tokens = 0
+        self._usage_lock = threading.Lock()
+
+    def _record_usage(self, usage) -> None:
+        with self._usage_lock:
+            self.total_input_tokens += usage.input_tokens
+            self.total_output_tokens += usage.output_tokens
+            self.total_cache_read_tokens += getattr(usage, 'cache_read_input_tokens', None) or 0
+            self.total_cache_creation_tokens += getattr(usage, 'cache_creation_input_tokens', None) or 0
 
     def stream_teaching_content(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> Generator[str, None, None]:
         model = model or self.default_model
@@ -32,8 +59,7 @@ class ClaudeClient:
                 for text in stream.text_stream:
                     yield text
                 response = stream.get_final_message()
-                self.total_input_tokens += response.usage.input_tokens
-                self.total_output_tokens += response.usage.output_tokens
+                self._record_usage(response.usage)
         except anthropic.APIConnectionError:
             yield "\n\n[Connection error. Please try again.]"
         except anthropic.RateLimitError:
@@ -42,6 +68,18 @@ class ClaudeClient:
             logger.error(f"Streaming error: {e}")
             yield f"\n\n[Error: {str(e)}]"
 
+    def generate_teaching_content(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> str:
+        """Non-streaming variant for offline callers; API errors propagate to the caller."""
+        model = model or self.default_model
+        response = self.client.messages.create(
+            model=model,
+            max_tokens=self.max_tokens_teaching,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+        self._record_usage(response.usage)
+        return response.content[0].text
+
     def generate_quiz(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> str:
         model = model or self.default_model
         response = self.client.messages.create(
@@ -50,8 +88,36 @@ class ClaudeClient:
             system=system_prompt,
             messages=[{"role": "user", "content": user_prompt}]
         )
-        self.total_input_tokens += response.usage.input_tokens
-        self.total_output_tokens += response.usage.output_tokens
+        self._record_usage(response.usage)
+        return response.content[0].text
+
+    def stream_conversation(self, system: list[dict], messages: list[dict], model: Optional[str] = None) -> Generator[str, None, None]:
+        """Stream a reply to a multi-turn conversation; API errors propagate to the caller.
+
+        `system` is a list of content blocks so callers can mark a stable
+        prefix with cache_control.
+        """
+        model = model or self.default_model
+        with self.client.messages.stream(
+            model=model,
+            max_tokens=self.max_tokens_followup,
+            system=system,
+            messages=messages
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            response = stream.get_final_message()
+        self._record_usage(response.usage)
+
+    def summarize(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> str:
+        model = model or self.default_model
+        response = self.client.messages.create(
+            model=model,
+            max_tokens=self.max_tokens_summary,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+        self._record_usage(response.usage)
         return response.content[0].text
 
     def generate_insights(self, system_prompt: str, user_prompt: str, model: Optional[str] = None) -> str:
@@ -66,11 +132,21 @@ class ClaudeClient:
             return response.content[0].text
         except Exception as e:
             logger.error(f"Error generating insights: {e}")
-            return "Unable to generate insights at this time."
+            return InsightsPrompts.UNAVAILABLE_MESSAGE
+
+    def start_keepalive(self) -> None:
+        """Warm the upstream pool in the background and ping it while idle."""
+        self.warmer.start()
+
+    def get_connection_stats(self) -> dict:
+        return self.connection_metrics.snapshot()
 
     def get_usage_stats(self) -> dict:
-        return {
-            "input_tokens": self.total_input_tokens,
-            "output_tokens": self.total_output_tokens,
-            "total_tokens": self.total_input_tokens + self.total_output_tokens
-        }
+        with self._usage_lock:
+            return {
+                "input_tokens": self.total_input_tokens,
+                "output_tokens": self.total_output_tokens,
+                "cache_read_tokens": self.total_cache_read_tokens,
+                "cache_creation_tokens": self.total_cache_creation_tokens,
+                "total_tokens": self.total_input_tokens + self.total_output_tokens
+            }
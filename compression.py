@@ -0,0 +1,41 @@
+"""Negotiated response compression for Learnify API responses"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+MIN_SIZE = 500
+
+
+def _choose_encoding():
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    accepted = request.accept_encodings
+    return next((e for e in offered if accepted[e]), None)
+
+
+def compress_response(response):
+    """Compress buffered JSON bodies; streamed responses such as SSE pass through untouched."""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = _choose_encoding()
+    if len(data) < MIN_SIZE or not encoding:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=5)
+    else:
+        compressed = gzip.compress(data, compresslevel=6)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -1,15 +1,47 @@
 """Learnify Configuration"""
 import os
+import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+    ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL')
+    ANTHROPIC_MAX_RETRIES = int(os.getenv('ANTHROPIC_MAX_RETRIES', 2))
+    ANTHROPIC_MAX_CONNECTIONS = int(os.getenv('ANTHROPIC_MAX_CONNECTIONS', os.getenv('GUNICORN_THREADS', 4)))
+    ANTHROPIC_KEEPALIVE_EXPIRY = float(os.getenv('ANTHROPIC_KEEPALIVE_EXPIRY', 120))
+    ANTHROPIC_HTTP2 = os.getenv('ANTHROPIC_HTTP2', 'true').lower() == 'true'
+    ANTHROPIC_WARM_CONNECTIONS = int(os.getenv('ANTHROPIC_WARM_CONNECTIONS', 1))
+    ANTHROPIC_KEEPALIVE_INTERVAL = float(os.getenv('ANTHROPIC_KEEPALIVE_INTERVAL', 30))
     DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'claude-sonnet-4-20250514')
     MAX_TOKENS_TEACHING = int(os.getenv('MAX_TOKENS_TEACHING', 4096))
     MAX_TOKENS_QUIZ = int(os.getenv('MAX_TOKENS_QUIZ', 2048))
+    MAX_TOKENS_FOLLOWUP = int(os.getenv('MAX_TOKENS_FOLLOWUP', 1024))
+    MAX_TOKENS_SUMMARY = int(os.getenv('MAX_TOKENS_SUMMARY', 512))
+    FOLLOWUP_HISTORY_TOKENS = int(os.getenv('FOLLOWUP_HISTORY_TOKENS', 2000))
+    FOLLOWUP_KEEP_TURNS = int(os.getenv('FOLLOWUP_KEEP_TURNS', 2))
+    FOLLOWUP_MAX_QUESTION_CHARS = int(os.getenv('FOLLOWUP_MAX_QUESTION_CHARS', 1000))
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///learnify.db')
+    DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    QUIZ_CACHE_SIZE = int(os.getenv('QUIZ_CACHE_SIZE', 256))
+    HTTP_CACHE_TTL = float(os.getenv('HTTP_CACHE_TTL', 30))
+    RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 30))
+    EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'learnify-exports'))
+    PDF_WORKERS = int(os.getenv('PDF_WORKERS', 2))
+    PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', 60))
+    EXPORT_TOKEN = os.getenv('EXPORT_TOKEN')
+    ABANDONED_RETENTION_HOURS = float(os.getenv('ABANDONED_RETENTION_HOURS', 48))
+    RETENTION_DAYS = float(os.getenv('RETENTION_DAYS', 365))
+    RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', 500))
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
 
 def get_config():
     return Config
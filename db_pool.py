@@ -0,0 +1,143 @@
+"""Database engine construction and connection-pool metrics for Learnify"""
+import time
+import logging
+import threading
+from typing import Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Checkout wait times, timeouts and query time for one engine."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_seconds += seconds
+
+    def snapshot(self, engine: Engine) -> dict:
+        pool = engine.pool
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+                'queries': self.queries,
+                'query_ms': round(self.query_seconds * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'idle': pool.checkedin(),
+            })
+        return stats
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout()
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _sqlite_pragmas(config):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+        if cursor.execute("PRAGMA page_count").fetchone()[0] == 0:
+            # auto_vacuum only takes on a database with no pages yet, and
+            # switching to WAL writes the first one, so it has to come first
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute(f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+    return on_connect
+
+
+def _time_queries(engine: Engine, metrics: PoolMetrics) -> None:
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.record_query(time.perf_counter() - conn.info['query_start'].pop())
+
+    def on_error(context):
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    event.listen(engine, 'after_cursor_execute', after_execute)
+    event.listen(engine, 'handle_error', on_error)
+
+
+def build_engine(url: str, config, metrics: Optional[PoolMetrics] = None) -> Engine:
+    """create_engine with pool sizing from Config and per-dialect tuning.
+
+    SQLite files get WAL, a busy timeout and relaxed fsync; in-memory SQLite
+    keeps SQLAlchemy's single-connection pool. Server databases get
+    pre-ping and recycling so connections dropped by the server or a proxy
+    are replaced instead of surfacing as request errors.
+    """
+    parsed = make_url(url)
+    kwargs = {}
+    in_memory = parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:')
+    if not in_memory:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+        if parsed.get_backend_name() != 'sqlite':
+            kwargs.update(pool_pre_ping=config.DB_POOL_PRE_PING, pool_recycle=config.DB_POOL_RECYCLE)
+
+    engine = create_engine(url, **kwargs)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.metrics = metrics
+    if parsed.get_backend_name() == 'sqlite' and not in_memory:
+        event.listen(engine, 'connect', _sqlite_pragmas(config))
+    if metrics:
+        _time_queries(engine, metrics)
+    return engine
@@ -0,0 +1,45 @@
+"""Export Learnify learning sessions as NDJSON or CSV
+
+Streams rows in chunks, so memory stays flat regardless of table size:
+
+    python export_sessions.py --format csv --include-results > sessions.csv
+    python export_sessions.py --since 2025-01-01 --until 2025-02-01 -o january.ndjson
+"""
+import sys
+import argparse
+from exporter import FORMATS, export_sessions, parse_datetime
+from services import get_session_manager
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Export Learnify learning sessions.')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('--since', help='Only sessions created at or after this ISO date/time')
+    parser.add_argument('--until', help='Only sessions created before this ISO date/time')
+    parser.add_argument('--include-content', action='store_true', help='Include teaching_content')
+    parser.add_argument('--include-results', action='store_true', help='Include per-question results')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched per round trip')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    try:
+        since, until = parse_datetime(args.since), parse_datetime(args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rows = get_session_manager().iter_sessions(
+        since, until, include_content=args.include_content, include_results=args.include_results,
+        chunk_size=args.chunk_size
+    )
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for chunk in export_sessions(rows, args.format, args.include_content, args.include_results):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Streaming NDJSON/CSV serialization of learning sessions"""
+import io
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+SESSION_FIELDS = [
+    'session_id', 'topic', 'difficulty', 'score', 'total_questions',
+    'percentage', 'created_at', 'completed_at'
+]
+RESULT_FIELDS = [
+    'question_id', 'question', 'concept_tested', 'selected_option_id',
+    'correct_option_id', 'is_correct'
+]
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CHUNK_SIZE = 64 * 1024
+
+
+def flatten_results(quiz_data: Optional[str]) -> list[dict]:
+    """One dict per answered question, joined with its question text and correct option."""
+    if not quiz_data:
+        return []
+    data = json.loads(quiz_data)
+    questions = {q['id']: q for q in data.get('questions', [])}
+    flattened = []
+    for result in data.get('results', []):
+        question = questions.get(result['question_id'], {})
+        correct = next((o['id'] for o in question.get('options', []) if o.get('is_correct')), None)
+        flattened.append({
+            'question_id': result['question_id'],
+            'question': question.get('question'),
+            'concept_tested': result.get('concept_tested') or question.get('concept_tested'),
+            'selected_option_id': result['selected_option_id'],
+            'correct_option_id': correct,
+            'is_correct': result['is_correct'],
+        })
+    return flattened
+
+
+def _session_record(row: dict, include_content: bool) -> dict:
+    record = {}
+    for field in SESSION_FIELDS:
+        value = row.get(field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    if include_content:
+        record['teaching_content'] = row.get('teaching_content')
+    return record
+
+
+def _chunked(pieces: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Coalesce small writes so the WSGI server sends fewer, larger chunks."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _ndjson_lines(rows: Iterable[dict], include_content: bool, include_results: bool) -> Iterator[str]:
+    for row in rows:
+        record = _session_record(row, include_content)
+        if include_results:
+            record['results'] = flatten_results(row.get('quiz_data'))
+        yield json.dumps(record) + '\n'
+
+
+def _csv_lines(rows: Iterable[dict], include_content: bool, include_results: bool) -> Iterator[str]:
+    header = SESSION_FIELDS + (['teaching_content'] if include_content else [])
+    if include_results:
+        header += RESULT_FIELDS
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=header)
+
+    def drain() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    yield drain()
+    for row in rows:
+        record = _session_record(row, include_content)
+        results = flatten_results(row.get('quiz_data')) if include_results else []
+        for result in results or [{}]:
+            writer.writerow({**record, **result})
+        yield drain()
+
+
+def export_sessions(rows: Iterable[dict], fmt: str = 'ndjson', include_content: bool = False,
+                    include_results: bool = False) -> Iterator[str]:
+    """Serialize session rows as NDJSON (results nested) or CSV (one row per answered question)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+    lines = _ndjson_lines if fmt == 'ndjson' else _csv_lines
+    return _chunked(lines(rows, include_content, include_results))
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r} (expected ISO 8601, e.g. 2025-01-31)")
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)  # stored timestamps are naive UTC
+    return parsed
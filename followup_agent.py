@@ -0,0 +1,85 @@
+"""Follow-up Q&A agent for Learnify
+
+Each request sends the lesson as a cached system prefix, a running summary
+of older exchanges, and only the most recent turns verbatim. Once the
+verbatim turns outgrow their token budget, the oldest are folded into the
+summary, so input per question stays roughly constant however long the
+conversation runs.
+"""
+import logging
+from typing import TYPE_CHECKING, Generator, Optional
+from config import get_config
+from prompt_templates import FollowUpPrompts
+
+if TYPE_CHECKING:
+    from claude_client import ClaudeClient
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count for budgeting; the API reports exact usage afterwards."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class FollowUpAgent:
+    def __init__(self, claude_client: Optional["ClaudeClient"] = None,
+                 history_tokens: Optional[int] = None, keep_turns: Optional[int] = None):
+        config = get_config()
+        self._client = claude_client
+        self.history_tokens = history_tokens or config.FOLLOWUP_HISTORY_TOKENS
+        self.keep_turns = config.FOLLOWUP_KEEP_TURNS if keep_turns is None else keep_turns
+
+    @property
+    def client(self) -> "ClaudeClient":
+        """The given client, or the shared lazily built one."""
+        if self._client is None:
+            from services import get_claude_client
+            self._client = get_claude_client()
+        return self._client
+
+    @staticmethod
+    def build_system(topic: str, difficulty: str, lesson: str, summary: Optional[str]) -> list[dict]:
+        # Lesson block is identical on every turn of a session: cache up to it
+        blocks = [
+            {"type": "text", "text": FollowUpPrompts.SYSTEM_PROMPT},
+            {"type": "text", "text": FollowUpPrompts.get_lesson_context(topic, difficulty, lesson),
+             "cache_control": {"type": "ephemeral"}},
+        ]
+        if summary:
+            blocks.append({"type": "text", "text": FollowUpPrompts.get_summary_context(summary)})
+        return blocks
+
+    def stream_answer(self, topic: str, difficulty: str, lesson: str, thread: dict,
+                      question: str) -> Generator[str, None, None]:
+        logger.info(f"Follow-up on {topic} ({len(thread['turns']) // 2} recent exchanges)")
+        messages = thread['turns'] + [{"role": "user", "content": question}]
+        yield from self.client.stream_conversation(
+            self.build_system(topic, difficulty, lesson, thread['summary']), messages
+        )
+
+    def compaction(self, topic: str, thread: dict) -> Optional[tuple[str, int]]:
+        """A new summary folding in the oldest turns and how many it covers, or None if within budget."""
+        turns = thread['turns']
+        if sum(estimate_tokens(t['content']) for t in turns) <= self.history_tokens:
+            return None
+        split = max(len(turns) - self.keep_turns * 2, 0)
+        if not split:
+            return None
+        try:
+            return self._summarize(topic, thread['summary'], turns[:split]), split
+        except Exception as e:
+            # Keep the turns; the next exchange retries the compaction
+            logger.error(f"Error compacting follow-up history: {e}")
+            return None
+
+    def _summarize(self, topic: str, summary: Optional[str], turns: list[dict]) -> str:
+        transcript = "\n\n".join(
+            f"{'Learner' if t['role'] == 'user' else 'Tutor'}: {t['content']}" for t in turns
+        )
+        return self.client.summarize(
+            FollowUpPrompts.SUMMARY_SYSTEM_PROMPT,
+            FollowUpPrompts.get_summary_prompt(topic, summary or '', transcript)
+        )
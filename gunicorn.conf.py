@@ -0,0 +1,35 @@
+"""Gunicorn settings for Learnify
+
+The app is loaded once in the master (preload_app) and workers fork from
+it, sharing imported modules copy-on-write. Database engines and the
+Claude client are created lazily inside each worker.
+"""
+import gc
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = True
+
+
+def on_starting(server):
+    import services
+    services.preload_modules()
+
+
+def when_ready(server):
+    # Keep the preloaded heap out of the collector so GC passes in workers
+    # don't touch (and un-share) those pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import services
+    services.after_fork()
+
+
+def post_worker_init(worker):
+    # Open upstream connections before the first learner request needs one
+    import services
+    services.warm_upstream()
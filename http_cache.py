@@ -0,0 +1,81 @@
+"""Conditional GET and short-lived payload caching for Learnify"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from flask import request, Response
+
+
+class UncacheablePayload(Exception):
+    """Raised by a build callback whose body must be served but not cached or tagged."""
+
+    def __init__(self, body: str | bytes):
+        super().__init__('uncacheable payload')
+        self.body = body
+
+
+class PayloadCache:
+    """Per-worker TTL cache of rendered response bodies.
+
+    Entries are keyed by resource *and* version, so a write that bumps the
+    version makes the old body unreachable immediately; the TTL caps how long
+    any body is reused regardless.
+    """
+
+    def __init__(self, ttl: float = 30, max_size: int = 512):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            expires, body = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def conditional_response(cache: PayloadCache, resource: str, version,
+                         build: Callable[[], str | bytes],
+                         mimetype: str = 'application/json') -> Response:
+    """Answer If-None-Match with 304, else serve the cached or freshly built body.
+
+    `build` only runs when neither the client nor this worker has the
+    current version.
+    """
+    tag = f"{resource}-{version}"
+    if request.if_none_match.contains_weak(tag):
+        response = Response(status=304)
+    else:
+        body = cache.get(tag)
+        if body is None:
+            try:
+                body = build()
+            except UncacheablePayload as e:
+                response = Response(e.body, mimetype=mimetype)
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            cache.put(tag, body)
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(tag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,165 @@
+"""Upstream HTTP transport construction and connection metrics for the Claude client"""
+import time
+import logging
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import anthropic
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionMetrics:
+    """New vs reused upstream connections, connect time and keep-alive pings."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.max_connect_seconds = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+        self.http_versions = {}
+        self.last_activity = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_request(self, http_version: str, connect_seconds: Optional[float]) -> None:
+        with self._lock:
+            self.requests += 1
+            self.http_versions[http_version] = self.http_versions.get(http_version, 0) + 1
+            self.last_activity = time.monotonic()
+            if connect_seconds is not None:
+                self.new_connections += 1
+                self.connect_seconds += connect_seconds
+                self.max_connect_seconds = max(self.max_connect_seconds, connect_seconds)
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_activity
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': self.requests - self.new_connections,
+                'reuse_ratio': round(1 - self.new_connections / self.requests, 3) if self.requests else None,
+                'avg_connect_ms': round(self.connect_seconds / self.new_connections * 1000, 1)
+                if self.new_connections else 0,
+                'max_connect_ms': round(self.max_connect_seconds * 1000, 1),
+                'pings': self.pings,
+                'ping_failures': self.ping_failures,
+                'http_versions': dict(self.http_versions),
+            }
+
+
+def _event_hooks(metrics: ConnectionMetrics) -> dict:
+    """Attach an httpcore trace to each request to see whether it opened a connection."""
+
+    def on_request(request: httpx.Request) -> None:
+        timings = {}
+
+        def trace(event_name: str, info: dict) -> None:
+            if event_name == 'connection.connect_tcp.started':
+                timings['start'] = time.perf_counter()
+            elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+                timings['end'] = time.perf_counter()
+
+        request.extensions['trace'] = trace
+        request.extensions['learnify_timings'] = timings
+
+    def on_response(response: httpx.Response) -> None:
+        if response.request.extensions.get('learnify_ping'):
+            return
+        timings = response.request.extensions.get('learnify_timings', {})
+        connect = timings['end'] - timings['start'] if 'start' in timings and 'end' in timings else None
+        metrics.record_request(response.http_version, connect)
+
+    return {'request': [on_request], 'response': [on_response]}
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec('h2') is not None
+
+
+def build_http_client(config, metrics: ConnectionMetrics) -> httpx.Client:
+    """SDK-default httpx client with pool limits, keep-alive expiry and HTTP/2 from Config.
+
+    The pool holds at most ANTHROPIC_MAX_CONNECTIONS connections. Over
+    HTTP/1.1 that also caps concurrent upstream calls, with extra callers
+    waiting for a free connection; over HTTP/2 calls are multiplexed as
+    streams on the pooled connections and are not capped here.
+    """
+    http2 = config.ANTHROPIC_HTTP2 and http2_available()
+    if config.ANTHROPIC_HTTP2 and not http2:
+        logger.info("h2 is not installed; using HTTP/1.1 for the Claude API")
+    return anthropic.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=config.ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=config.ANTHROPIC_MAX_CONNECTIONS,
+            keepalive_expiry=config.ANTHROPIC_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        event_hooks=_event_hooks(metrics),
+    )
+
+
+class ConnectionWarmer:
+    """Opens upstream connections ahead of use and keeps them from idling out.
+
+    A ping is a HEAD request to the API origin: it needs no credentials,
+    costs no tokens, and leaves a live connection in the pool.
+    """
+
+    def __init__(self, http_client: httpx.Client, base_url: str, metrics: ConnectionMetrics,
+                 connections: int = 1, interval: float = 30, timeout: float = 5):
+        self.http_client = http_client
+        self.base_url = base_url
+        self.metrics = metrics
+        self.connections = max(1, connections)
+        self.interval = interval
+        self.timeout = timeout
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    def _ping(self) -> bool:
+        try:
+            self.http_client.request('HEAD', self.base_url, timeout=self.timeout,
+                                     extensions={'learnify_ping': True})
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Upstream keep-alive ping failed: {e}")
+            return False
+
+    def warm_up(self) -> None:
+        """Open (or refresh) up to `connections` pooled connections concurrently."""
+        if self.connections == 1:
+            results = [self._ping()]
+        else:
+            with ThreadPoolExecutor(max_workers=self.connections) as pool:
+                results = list(pool.map(lambda _: self._ping(), range(self.connections)))
+        for ok in results:
+            self.metrics.record_ping(ok)
+
+    def _run(self) -> None:
+        self.warm_up()
+        if self.interval <= 0:
+            return
+        while not self._done.wait(self.interval):
+            if self.metrics.idle_seconds() >= self.interval:
+                self.warm_up()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='upstream-keepalive', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._done.set()
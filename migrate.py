@@ -0,0 +1,14 @@
+"""Create or update the Learnify database schema
+
+Run once per deploy, before starting workers:
+
+    python migrate.py
+"""
+import logging
+from services import get_session_manager
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    session_manager = get_session_manager()
+    session_manager.create_schema()
+    logging.getLogger('migrate').info(f"Schema up to date: {session_manager.engine.url!r}")
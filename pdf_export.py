@@ -0,0 +1,268 @@
+"""PDF export of learning sessions for Learnify
+
+Rendering runs in a small process pool so reportlab layout never blocks a
+request thread; finished files are cached on disk keyed by session and
+content hash.
+"""
+import os
+import re
+import html
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CODE_SPAN = re.compile(r'`([^`]+)`')
+EMPHASIS_PATTERNS = [
+    (re.compile(r'\*\*(.+?)\*\*'), r'<b>\1</b>'),
+    (re.compile(r'(?<!\*)\*(?!\s)(.+?)(?<!\s)\*(?!\*)'), r'<i>\1</i>'),
+]
+
+
+def _emphasis(text: str) -> str:
+    text = html.escape(text, quote=False)
+    for pattern, replacement in EMPHASIS_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _inline(text: str) -> str:
+    """Markdown inline markup to reportlab markup.
+
+    Code spans are cut out first and only escaped, so emphasis markers
+    inside them (or pairing across them) never produce tags.
+    """
+    parts, last = [], 0
+    for match in CODE_SPAN.finditer(text):
+        parts.append(_emphasis(text[last:match.start()]))
+        parts.append(f'<font face="Courier">{html.escape(match.group(1), quote=False)}</font>')
+        last = match.end()
+    parts.append(_emphasis(text[last:]))
+    return ''.join(parts)
+
+
+def _paragraph(markup: str, plain: str, style):
+    """Paragraph from markup, or from escaped plain text if reportlab rejects the markup."""
+    from reportlab.platypus import Paragraph
+
+    try:
+        return Paragraph(markup, style)
+    except ValueError:
+        logger.warning(f"Falling back to plain text for unparseable markup: {plain[:80]!r}")
+        return Paragraph(html.escape(plain, quote=False), style)
+
+
+def _text(text: str, style):
+    return _paragraph(_inline(text), text, style)
+
+
+def _markdown_flowables(markdown: str, styles) -> list:
+    """Convert the Markdown subset the teaching prompt produces into platypus flowables."""
+    from reportlab.platypus import Preformatted, Spacer, ListFlowable, ListItem
+
+    flowables, paragraph, bullets, code = [], [], [], None
+
+    def flush_paragraph():
+        if paragraph:
+            flowables.append(_text(' '.join(paragraph), styles['BodyText']))
+            paragraph.clear()
+
+    def flush_bullets():
+        if bullets:
+            flowables.append(ListFlowable(
+                [ListItem(_text(b, styles['BodyText'])) for b in bullets],
+                bulletType='bullet', leftIndent=12
+            ))
+            bullets.clear()
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if code is not None:
+            if stripped.startswith('```'):
+                flowables.append(Preformatted('\n'.join(code), styles['Code']))
+                code = None
+            else:
+                code.append(line)
+            continue
+        if stripped.startswith('```'):
+            flush_paragraph()
+            flush_bullets()
+            code = []
+        elif not stripped:
+            flush_paragraph()
+            flush_bullets()
+        elif stripped.startswith('#'):
+            flush_paragraph()
+            flush_bullets()
+            level = min(len(stripped) - len(stripped.lstrip('#')), 3)
+            flowables.append(_text(stripped.lstrip('#').strip(), styles[f'Heading{level + 1}']))
+        elif re.match(r'^([-*+]|\d+\.)\s+', stripped):
+            flush_paragraph()
+            bullets.append(re.sub(r'^([-*+]|\d+\.)\s+', '', stripped))
+        elif stripped.startswith('>'):
+            flush_paragraph()
+            flush_bullets()
+            flowables.append(_text(stripped.lstrip('> '), styles['Italic']))
+        elif stripped in ('---', '***'):
+            flush_paragraph()
+            flush_bullets()
+            flowables.append(Spacer(1, 8))
+        else:
+            flush_bullets()
+            paragraph.append(stripped)
+
+    if code is not None:
+        flowables.append(Preformatted('\n'.join(code), styles['Code']))
+    flush_paragraph()
+    flush_bullets()
+    return flowables
+
+
+def _quiz_flowables(quiz_data: dict, styles) -> list:
+    from reportlab.platypus import Paragraph, Spacer
+
+    results = {r['question_id']: r for r in quiz_data.get('results', [])}
+    flowables = [Paragraph('Quiz Review', styles['Heading1'])]
+    if quiz_data.get('total'):
+        score = sum(1 for r in results.values() if r['is_correct'])
+        flowables.append(Paragraph(f"Score: {score} / {quiz_data['total']}", styles['BodyText']))
+
+    for number, question in enumerate(quiz_data.get('questions', []), 1):
+        result = results.get(question['id'])
+        flowables.append(Spacer(1, 6))
+        flowables.append(_text(f"{number}. {question['question']}", styles['Heading3']))
+        for option in question.get('options', []):
+            marks = []
+            if option.get('is_correct'):
+                marks.append('correct answer')
+            if result and result['selected_option_id'] == option['id']:
+                marks.append('your answer')
+            suffix = f" <i>({', '.join(marks)})</i>" if marks else ''
+            text = f"{option['id']}. {_inline(option['text'])}{suffix}"
+            flowables.append(_paragraph(f"<b>{text}</b>" if marks else text,
+                                        f"{option['id']}. {option['text']}", styles['BodyText']))
+        if result:
+            flowables.append(_text(result.get('feedback', ''), styles['Italic']))
+        flowables.append(_text(f"Concept: {question.get('concept_tested', '')}", styles['BodyText']))
+    return flowables
+
+
+def render_session_pdf(session: dict) -> bytes:
+    """Render a lesson plus quiz review. Runs inside a pool worker process."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+    styles = getSampleStyleSheet()
+    buffer = BytesIO()
+    topic = html.unescape(session['topic'])  # stored topics are already HTML-escaped
+    doc = SimpleDocTemplate(buffer, pagesize=A4, title=f"Learnify: {topic}", author='Learnify')
+
+    story = [
+        _text(topic, styles['Title']),
+        _text(f"Level: {session.get('difficulty') or 'intermediate'}", styles['BodyText']),
+    ]
+    story.extend(_markdown_flowables(session.get('teaching_content') or '', styles))
+    if session.get('quiz_data'):
+        story.append(PageBreak())
+        story.extend(_quiz_flowables(session['quiz_data'], styles))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+class PdfExporter:
+    def __init__(self, cache_dir: str, max_workers: int = 2, timeout: float = 60):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: dict[str, tuple[Future, ProcessPoolExecutor]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: forking a threaded server process is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a pool a render process died in, so the next submit starts a new one."""
+        with self._lock:
+            self._in_flight = {k: v for k, v in self._in_flight.items() if v[1] is not pool}
+            if self._pool is pool:
+                logger.warning("PDF render process died; restarting the pool")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _render(self, key: str, session: dict) -> bytes:
+        """Render on the pool, sharing one render among concurrent requests for the same key."""
+        owner, future, pool = False, None, None
+        try:
+            with self._lock:
+                future, pool = self._in_flight.get(key) or (None, self._get_pool())
+                if future is None:
+                    future = pool.submit(render_session_pdf, session)
+                    self._in_flight[key] = (future, pool)
+                    owner = True
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+        finally:
+            if owner:
+                with self._lock:
+                    if self._in_flight.get(key, (None, None))[0] is future:
+                        del self._in_flight[key]
+
+    @staticmethod
+    def cache_key(session_id: str, teaching_content: str, quiz_data: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        digest.update((teaching_content or '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((quiz_data or '').encode('utf-8'))
+        return f"{session_id}-{digest.hexdigest()[:16]}"
+
+    def get_pdf(self, session_id: str, topic: str, difficulty: str,
+                teaching_content: str, quiz_data: Optional[str]) -> str:
+        """Return the path of the rendered PDF, rendering it on the pool if not cached."""
+        key = self.cache_key(session_id, teaching_content, quiz_data)
+        path = os.path.join(self.cache_dir, f"{key}.pdf")
+        if os.path.exists(path):
+            return path
+
+        session = {
+            'topic': topic,
+            'difficulty': difficulty,
+            'teaching_content': teaching_content,
+            'quiz_data': json.loads(quiz_data) if quiz_data else None,
+        }
+        try:
+            pdf = self._render(key, session)
+        except BrokenProcessPool:
+            # e.g. a render process was OOM-killed; retry once on a fresh pool
+            pdf = self._render(key, session)
+
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+            logger.info(f"Rendered PDF {key} ({len(pdf)} bytes)")
+        return path
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,4 +1,5 @@
 """Prompt Templates for Learnify"""
+from typing import Optional
 
 class TeachingPrompts:
     SYSTEM_PROMPT = """You are a master teacher who creates "aha moments" - those crystalline instants where understanding clicks into place. You teach like Richard Feynman or 3Blue1Brown: through insight, not information.
@@ -185,10 +186,20 @@ Return ONLY the JSON object."""
 class InsightsPrompts:
     SYSTEM_PROMPT = """You are a learning analytics expert who provides personalized feedback and study recommendations. Be encouraging but honest, specific and actionable."""
 
+    UNAVAILABLE_MESSAGE = "Unable to generate insights at this time."
+
     @staticmethod
-    def get_insights_prompt(topic: str, score: int, total: int, wrong_answers: list) -> str:
+    def get_insights_prompt(topic: str, score: int, total: int, wrong_answers: list,
+                            commonly_missed: Optional[list] = None) -> str:
         percentage = (score / total * 100) if total > 0 else 0
         wrong_list = "\n".join([f"- {c}" for c in wrong_answers]) if wrong_answers else "None"
+        common = ""
+        if commonly_missed:
+            common_list = "\n".join(f"- {c}" for c in commonly_missed)
+            common = f"""
+Concepts other learners most often miss on this topic (mention if relevant):
+{common_list}
+"""
         return f"""Provide personalized learning insights:
 
 Topic: {topic}
@@ -196,7 +207,7 @@ Score: {score}/{total} ({percentage:.0f}%)
 
 Concepts struggled with:
 {wrong_list}
-
+{common}
 Provide:
 1. **Performance Summary** (2-3 encouraging sentences)
 2. **Strengths** (what they demonstrated understanding of)
@@ -205,3 +216,34 @@ Provide:
 5. **Encouragement** (motivating closing message)
 
 Use Markdown formatting."""
+
+
+class FollowUpPrompts:
+    SYSTEM_PROMPT = """You are the same master teacher who wrote the lesson below, now answering the learner's follow-up questions about it.
+
+- Build on the lesson's core mental model and examples instead of introducing new ones
+- Answer the question asked, concisely (under 250 words unless they ask for more)
+- If the question reveals a misconception, name it and correct it gently
+- If the question is off-topic, answer briefly and connect it back to the lesson
+
+Use Markdown formatting."""
+
+    SUMMARY_SYSTEM_PROMPT = """You condense tutoring conversations into notes the tutor will rely on later. Keep every question the learner asked, what was explained, and any misconception or point of confusion. Write plain prose, no preamble."""
+
+    @staticmethod
+    def get_lesson_context(topic: str, difficulty: str, lesson: str) -> str:
+        return f"""LESSON ({difficulty} level) on "{topic}":
+
+{lesson}"""
+
+    @staticmethod
+    def get_summary_context(summary: str) -> str:
+        return f"""EARLIER IN THIS CONVERSATION (summarized):
+{summary}"""
+
+    @staticmethod
+    def get_summary_prompt(topic: str, previous_summary: str, transcript: str) -> str:
+        earlier = f"Notes so far:\n{previous_summary}\n\n" if previous_summary else ""
+        return f"""{earlier}Continue the notes on this follow-up conversation about "{topic}" with the exchanges below. Return the complete updated notes in under 200 words.
+
+{transcript}"""
@@ -1,11 +1,15 @@
 """Quiz Manager for Learnify"""
 import json
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional
-from claude_client import ClaudeClient
+from typing import TYPE_CHECKING, Optional
 from prompt_templates import QuizPrompts
 
+if TYPE_CHECKING:
+    from claude_client import ClaudeClient
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -22,6 +26,13 @@ class QuizQuestion:
     question: str
     concept_tested: str
     options: list[QuizOption]
+    _options_by_id: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._options_by_id = {o.id: o for o in self.options}
+
+    def get_option(self, option_id: str) -> Optional[QuizOption]:
+        return self._options_by_id.get(option_id)
 
     def get_correct_option(self) -> Optional[QuizOption]:
         for option in self.options:
@@ -38,12 +49,43 @@ class QuizResult:
     understanding: str
     concept_tested: str
 
+    def to_dict(self) -> dict:
+        return {
+            "question_id": self.question_id,
+            "selected_option_id": self.selected_option_id,
+            "is_correct": self.is_correct,
+            "feedback": self.feedback,
+            "understanding": self.understanding,
+            "concept_tested": self.concept_tested
+        }
+
 @dataclass
 class Quiz:
     topic: str
     questions: list[QuizQuestion]
     results: list[QuizResult] = field(default_factory=list)
     current_index: int = 0
+    _questions_by_id: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _results_by_question: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._questions_by_id = {q.id: q for q in self.questions}
+        self._results_by_question = {r.question_id: r for r in self.results}
+
+    def get_question(self, question_id: int) -> Optional[QuizQuestion]:
+        return self._questions_by_id.get(question_id)
+
+    def get_result(self, question_id: int) -> Optional[QuizResult]:
+        return self._results_by_question.get(question_id)
+
+    def add_result(self, result: QuizResult) -> QuizResult:
+        """Record an answer; the first answer to a question is final."""
+        existing = self._results_by_question.get(result.question_id)
+        if existing:
+            return existing
+        self._results_by_question[result.question_id] = result
+        self.results.append(result)
+        return result
 
     @property
     def score(self) -> int:
@@ -83,22 +125,78 @@ class Quiz:
                 }
                 for q in self.questions
             ],
-            "results": [
-                {
-                    "question_id": r.question_id,
-                    "selected_option_id": r.selected_option_id,
-                    "is_correct": r.is_correct,
-                    "feedback": r.feedback,
-                    "concept_tested": r.concept_tested
-                }
-                for r in self.results
-            ]
+            "results": [r.to_dict() for r in self.results]
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Quiz":
+        questions = [
+            QuizQuestion(
+                id=q["id"],
+                question=q["question"],
+                concept_tested=q.get("concept_tested", "General understanding"),
+                options=[
+                    QuizOption(
+                        id=o["id"],
+                        text=o["text"],
+                        is_correct=o["is_correct"],
+                        feedback=o["feedback"],
+                        understanding=o["understanding"]
+                    )
+                    for o in q.get("options", [])
+                ]
+            )
+            for q in data.get("questions", [])
+        ]
+        results = [
+            QuizResult(
+                question_id=r["question_id"],
+                selected_option_id=r["selected_option_id"],
+                is_correct=r["is_correct"],
+                feedback=r.get("feedback", ""),
+                understanding=r.get("understanding", ""),
+                concept_tested=r.get("concept_tested", "")
+            )
+            for r in data.get("results", [])
+        ]
+        return cls(topic=data.get("topic", ""), questions=questions,
+                   results=results, current_index=len(results))
+
+
+class QuizCache:
+    """Small per-worker LRU of live quizzes keyed by session id."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._quizzes: OrderedDict[str, Quiz] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Quiz]:
+        with self._lock:
+            quiz = self._quizzes.get(session_id)
+            if quiz is not None:
+                self._quizzes.move_to_end(session_id)
+            return quiz
+
+    def put(self, session_id: str, quiz: Quiz) -> None:
+        with self._lock:
+            self._quizzes[session_id] = quiz
+            self._quizzes.move_to_end(session_id)
+            while len(self._quizzes) > self.max_size:
+                self._quizzes.popitem(last=False)
+
 
 class QuizManager:
-    def __init__(self, claude_client: Optional[ClaudeClient] = None):
-        self.client = claude_client or ClaudeClient()
+    def __init__(self, claude_client: Optional["ClaudeClient"] = None):
+        self._client = claude_client
+
+    @property
+    def client(self) -> "ClaudeClient":
+        """The given client, or the shared lazily built one."""
+        if self._client is None:
+            from services import get_claude_client
+            self._client = get_claude_client()
+        return self._client
 
     def generate_quiz(self, topic: str, teaching_content: str, num_questions: int = 4, difficulty: str = "intermediate") -> Quiz:
         logger.info(f"Generating quiz for: {topic}")
@@ -108,6 +206,10 @@ class QuizManager:
         )
         return self._parse_quiz_response(topic, response)
 
+    def load_quiz(self, topic: str, quiz_json: str) -> Quiz:
+        """Build a fresh Quiz from previously generated question JSON."""
+        return Quiz.from_dict({"topic": topic, "questions": json.loads(quiz_json)["questions"]})
+
     def _parse_quiz_response(self, topic: str, response: str) -> Quiz:
         try:
             clean_response = response.strip()
@@ -142,14 +244,21 @@ class QuizManager:
             logger.error(f"Failed to parse quiz: {e}")
             raise ValueError(f"Failed to parse quiz response: {e}")
 
-    def submit_answer(self, quiz: Quiz, question_id: int, selected_option_id: str) -> QuizResult:
-        question = next((q for q in quiz.questions if q.id == question_id), None)
+    def _resolve_answer(self, quiz: Quiz, question_id: int, selected_option_id: str) -> tuple[QuizQuestion, QuizOption]:
+        question = quiz.get_question(question_id)
         if not question:
             raise ValueError(f"Question {question_id} not found")
 
-        selected_option = next((o for o in question.options if o.id == selected_option_id), None)
+        selected_option = question.get_option(selected_option_id)
         if not selected_option:
             raise ValueError(f"Option {selected_option_id} not found")
+        return question, selected_option
+
+    def submit_answer(self, quiz: Quiz, question_id: int, selected_option_id: str) -> QuizResult:
+        question, selected_option = self._resolve_answer(quiz, question_id, selected_option_id)
+        existing = quiz.get_result(question_id)
+        if existing:
+            return existing
 
         result = QuizResult(
             question_id=question_id,
@@ -159,10 +268,23 @@ class QuizManager:
             understanding=selected_option.understanding,
             concept_tested=question.concept_tested
         )
-        quiz.results.append(result)
+        quiz.add_result(result)
         quiz.current_index += 1
         return result
 
+    def grade_answers(self, quiz: Quiz, answers: list[dict]) -> list[QuizResult]:
+        """Grade a batch of {question_id, selected_option} answers.
+
+        Every answer is validated before any is recorded, so a bad entry
+        leaves the quiz untouched. Already-answered questions keep their result.
+        """
+        for answer in answers:
+            self._resolve_answer(quiz, answer.get('question_id'), answer.get('selected_option'))
+        return [
+            self.submit_answer(quiz, answer['question_id'], answer['selected_option'])
+            for answer in answers
+        ]
+
     def get_performance_analysis(self, quiz: Quiz) -> dict:
         correct_concepts = [r.concept_tested for r in quiz.results if r.is_correct]
         incorrect_concepts = [r.concept_tested for r in quiz.results if not r.is_correct]
@@ -0,0 +1,135 @@
+"""Retention job for learning_sessions
+
+Archives, then deletes, sessions that were abandoned (lesson never
+finished or quiz never completed) or are past the retention window.
+Rows, with their follow-up threads nested under `followup_thread`, are
+written to a gzip NDJSON archive and flushed before each small
+delete batch, so an interrupted run leaves duplicates in the archive,
+never lost rows. A session completed after it was archived no longer
+matches the delete and is kept. Afterwards the table is compacted and
+re-analyzed.
+
+    python retention.py --dry-run
+    python retention.py --abandoned-hours 48 --retention-days 365
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import logging
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from config import get_config
+from services import get_session_manager
+from session_manager import SessionManager
+
+logger = logging.getLogger('retention')
+
+
+@dataclass
+class RetentionReport:
+    rows_archived: int = 0
+    rows_deleted: int = 0
+    archive_path: Optional[str] = None
+    archive_bytes: int = 0
+    bytes_before: Optional[int] = None
+    bytes_after: Optional[int] = None
+    free_pages_before: Optional[int] = None
+    free_pages_after: Optional[int] = None
+
+    @property
+    def bytes_reclaimed(self) -> Optional[int]:
+        if self.bytes_before is None or self.bytes_after is None:
+            return None
+        return self.bytes_before - self.bytes_after
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def run_retention(session_manager: SessionManager, archive_dir: str,
+                  abandoned_hours: Optional[float], retention_days: Optional[float],
+                  batch_size: int = 500, pause: float = 0.05, dry_run: bool = False,
+                  full_vacuum: bool = False) -> RetentionReport:
+    now = datetime.utcnow()
+    abandoned_before = now - timedelta(hours=abandoned_hours) if abandoned_hours else None
+    completed_before = now - timedelta(days=retention_days) if retention_days else None
+    report = RetentionReport(bytes_before=session_manager.get_database_size(),
+                             free_pages_before=session_manager.get_free_pages())
+
+    if dry_run:
+        report.rows_archived = session_manager.count_expired_sessions(abandoned_before, completed_before)
+        return report
+
+    os.makedirs(archive_dir, exist_ok=True)
+    report.archive_path = os.path.join(archive_dir, f"learning_sessions-{now:%Y%m%dT%H%M%S}.ndjson.gz")
+    with gzip.open(report.archive_path, 'wt', encoding='utf-8') as archive:
+        while True:
+            ids = session_manager.get_expired_session_ids(abandoned_before, completed_before, limit=batch_size)
+            if not ids:
+                break
+            for row in session_manager.get_session_rows(ids):
+                archive.write(json.dumps(row, default=_json_default) + '\n')
+            archive.flush()
+            os.fsync(archive.buffer.fileobj.fileno())
+            report.rows_archived += len(ids)
+            report.rows_deleted += session_manager.delete_sessions(ids, abandoned_before, completed_before)
+            logger.info(f"Archived and deleted {report.rows_deleted} sessions so far")
+            # Short pause between batches so request writers get the lock
+            time.sleep(pause)
+
+    if report.rows_deleted == 0:
+        os.remove(report.archive_path)
+        report.archive_path = None
+    else:
+        report.archive_bytes = os.path.getsize(report.archive_path)
+        session_manager.compact(full_vacuum=full_vacuum)
+    report.bytes_after = session_manager.get_database_size()
+    report.free_pages_after = session_manager.get_free_pages()
+    return report
+
+
+def main(argv=None) -> int:
+    config = get_config()
+    parser = argparse.ArgumentParser(description='Archive and delete old learning sessions.')
+    parser.add_argument('--abandoned-hours', type=float, default=config.ABANDONED_RETENTION_HOURS,
+                        help='Remove never-completed sessions older than this (0 disables)')
+    parser.add_argument('--retention-days', type=float, default=config.RETENTION_DAYS,
+                        help='Remove all sessions older than this (0 disables)')
+    parser.add_argument('--archive-dir', default=config.ARCHIVE_DIR)
+    parser.add_argument('--batch-size', type=int, default=config.RETENTION_BATCH_SIZE)
+    parser.add_argument('--vacuum', action='store_true',
+                        help='Run a full VACUUM afterwards (locks the table while it runs); '
+                             'also enables incremental vacuum on older SQLite files')
+    parser.add_argument('--dry-run', action='store_true', help='Only count matching sessions')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    report = run_retention(
+        get_session_manager(), args.archive_dir, args.abandoned_hours, args.retention_days,
+        batch_size=args.batch_size, dry_run=args.dry_run, full_vacuum=args.vacuum
+    )
+
+    if args.dry_run:
+        print(f"{report.rows_archived} sessions would be archived")
+        return 0
+    print(f"Archived {report.rows_archived} and deleted {report.rows_deleted} sessions")
+    if report.archive_path:
+        print(f"Archive: {report.archive_path} ({report.archive_bytes} bytes)")
+    if report.bytes_reclaimed is not None:
+        print(f"Database: {report.bytes_before} -> {report.bytes_after} bytes "
+              f"({report.bytes_reclaimed} reclaimed)")
+    if report.free_pages_after is not None:
+        # Free pages are reused by new rows but still count towards the file size
+        print(f"Free pages: {report.free_pages_before} -> {report.free_pages_after}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,7 @@ import logging
 from functools import wraps
 from collections import defaultdict
 from flask import request, jsonify, g
+from config import get_config
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,8 @@ class RateLimiter:
         self.requests = defaultdict(list)
 
     def is_allowed(self, client_id: str) -> bool:
+        if self.requests_per_minute <= 0:
+            return True
         now = time.time()
         minute_ago = now - 60
         self.requests[client_id] = [
@@ -34,7 +37,7 @@ class RateLimiter:
         return max(0, self.requests_per_minute - len(recent))
 
 
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(get_config().RATE_LIMIT_PER_MINUTE)
 
 
 def rate_limit(f):
@@ -0,0 +1,92 @@
+"""Lazily initialized Learnify subsystems
+
+Nothing here opens a database connection, imports the anthropic SDK or
+requires an API key until a request first needs it, so importing the app
+(and forking gunicorn workers) stays cheap and pages that never talk to
+Claude keep working without credentials.
+"""
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+from config import get_config
+from followup_agent import FollowUpAgent
+from quiz_manager import QuizManager
+from session_manager import SessionManager
+from teaching_agent import TeachingAgent
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """Thread-safe, build-once accessor. A failed build is retried on the next call."""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instance = None
+
+
+def _build_claude_client():
+    from claude_client import ClaudeClient
+    return ClaudeClient()
+
+
+def _build_session_manager() -> SessionManager:
+    return SessionManager()
+
+
+def _build_pdf_exporter():
+    from pdf_export import PdfExporter
+    config = get_config()
+    return PdfExporter(config.EXPORT_CACHE_DIR, max_workers=config.PDF_WORKERS,
+                       timeout=config.PDF_RENDER_TIMEOUT)
+
+
+get_claude_client = Lazy(_build_claude_client)
+get_session_manager = Lazy(_build_session_manager)
+get_teaching_agent = Lazy(TeachingAgent)
+get_quiz_manager = Lazy(QuizManager)
+get_followup_agent = Lazy(FollowUpAgent)
+get_pdf_exporter = Lazy(_build_pdf_exporter)
+
+
+def preload_modules() -> None:
+    """Import heavy modules without constructing anything.
+
+    Called from the gunicorn master under --preload so forked workers share
+    the imported pages copy-on-write.
+    """
+    import anthropic  # noqa: F401
+    import claude_client  # noqa: F401
+
+
+def warm_upstream() -> None:
+    """Build the Claude client in this worker and open its connections in the background.
+
+    Skipped without an API key so keyless deployments still boot.
+    """
+    if get_config().ANTHROPIC_API_KEY:
+        get_claude_client().start_keepalive()
+
+
+def after_fork() -> None:
+    """Drop connections inherited from the parent process; children open their own."""
+    if get_session_manager.initialized:
+        get_session_manager().dispose()
+    get_pdf_exporter.reset()
@@ -1,16 +1,23 @@
 """Session Manager for Learnify"""
+import os
 import json
 import logging
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float
+from typing import Iterator, Optional
+from sqlalchemy import event, func, select, update, delete, or_, and_, DDL, Column, Integer, String, Text, DateTime, Float, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import get_config
+from db_pool import PoolMetrics, build_engine
 
 logger = logging.getLogger(__name__)
 Base = declarative_base()
 
 
+def canonical_topic(topic: str) -> str:
+    return ' '.join(topic.lower().split())
+
+
 class LearningSession(Base):
     __tablename__ = 'learning_sessions'
 
@@ -40,13 +47,138 @@ class LearningSession(Base):
         }
 
 
+class ContentCache(Base):
+    """Pre-generated lesson and quiz for a (topic, difficulty) pair."""
+    __tablename__ = 'content_cache'
+    __table_args__ = (UniqueConstraint('topic_key', 'difficulty'),)
+
+    id = Column(Integer, primary_key=True)
+    topic_key = Column(String(256), nullable=False, index=True)
+    topic = Column(String(256), nullable=False)
+    difficulty = Column(String(32), nullable=False)
+    teaching_content = Column(Text)
+    quiz_data = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ConceptStat(Base):
+    """Attempts and misses per concept, rolled up as quizzes are completed."""
+    __tablename__ = 'concept_stats'
+    __table_args__ = (UniqueConstraint('topic_key', 'difficulty', 'concept_key'),)
+
+    id = Column(Integer, primary_key=True)
+    topic_key = Column(String(256), nullable=False)
+    difficulty = Column(String(32), nullable=False)
+    concept_key = Column(String(256), nullable=False)
+    topic = Column(String(256), nullable=False)
+    concept = Column(String(256), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    misses = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            'topic': self.topic,
+            'difficulty': self.difficulty,
+            'concept': self.concept,
+            'attempts': self.attempts,
+            'misses': self.misses,
+            'miss_rate': round(self.misses / self.attempts * 100, 1) if self.attempts else 0
+        }
+
+
+class FollowUpThread(Base):
+    """Follow-up Q&A on a session's lesson: a running summary plus the recent turns verbatim."""
+    __tablename__ = 'followup_threads'
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(64), unique=True, nullable=False, index=True)
+    summary = Column(Text)
+    turns = Column(Text)
+    compacted_turns = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ResourceVersion(Base):
+    """Monotonic change counter used to build ETags without re-running queries."""
+    __tablename__ = 'resource_versions'
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+SESSIONS_RESOURCE = 'sessions'
+ROLLED_UP_KEY = 'rolled_up'  # quiz_data key listing question ids already counted in concept_stats
+
+event.listen(ResourceVersion.__table__, 'after_create', DDL(
+    f"INSERT INTO resource_versions (name, version) VALUES ('{SESSIONS_RESOURCE}', 0)"
+))
+
+
 class SessionManager:
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(self, database_url: Optional[str] = None, read_url: Optional[str] = None):
         config = get_config()
         self.database_url = database_url or config.DATABASE_URL
-        self.engine = create_engine(self.database_url)
-        Base.metadata.create_all(self.engine)
+        # A configured replica only applies to the configured primary
+        self.read_url = read_url or (None if database_url else config.DATABASE_READ_URL)
+
+        self.pool_metrics = {'primary': PoolMetrics()}
+        self.engine = build_engine(self.database_url, config, self.pool_metrics['primary'])
+        if self.read_url:
+            self.pool_metrics['replica'] = PoolMetrics()
+            self.read_engine = build_engine(self.read_url, config, self.pool_metrics['replica'])
+        else:
+            self.read_engine = self.engine
         self.Session = sessionmaker(bind=self.engine)
+        self.ReadSession = sessionmaker(bind=self.read_engine)
+
+    def _read_session(self, fresh: bool = False):
+        """Session for reads that tolerate replica lag.
+
+        fresh=True reads from the primary; callers pass it when they must see
+        a write the same learner just made, possibly on another worker.
+        """
+        return self.Session() if fresh else self.ReadSession()
+
+    def get_pool_stats(self) -> dict:
+        engines = {'primary': self.engine, 'replica': self.read_engine}
+        return {name: metrics.snapshot(engines[name]) for name, metrics in self.pool_metrics.items()}
+
+    def dispose(self) -> None:
+        """Drop pooled connections without closing them; used after fork."""
+        self.engine.dispose(close=False)
+        if self.read_engine is not self.engine:
+            self.read_engine.dispose(close=False)
+
+    def create_schema(self) -> None:
+        """Create missing tables. Run via migrate.py, not on every worker boot."""
+        with self.engine.begin() as conn:
+            Base.metadata.create_all(conn)
+
+    def _bump_version(self, db, name: str = SESSIONS_RESOURCE) -> None:
+        """Increment a change counter inside the caller's transaction."""
+        result = db.execute(
+            update(ResourceVersion).where(ResourceVersion.name == name)
+            .values(version=ResourceVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.add(ResourceVersion(name=name, version=1))
+
+    def get_version(self, name: str = SESSIONS_RESOURCE) -> int:
+        db = self._read_session()
+        try:
+            version = db.query(ResourceVersion.version).filter_by(name=name).scalar()
+            return version or 0
+        finally:
+            db.close()
+
+    def get_completed_at(self, session_id: str, fresh: bool = False) -> Optional[datetime]:
+        db = self._read_session(fresh)
+        try:
+            return db.query(LearningSession.completed_at).filter_by(session_id=session_id).scalar()
+        finally:
+            db.close()
 
     def create_session(self, session_id: str, topic: str, difficulty: str = "intermediate") -> LearningSession:
         db = self.Session()
@@ -57,14 +189,15 @@ class SessionManager:
                 difficulty=difficulty
             )
             db.add(session)
+            self._bump_version(db)
             db.commit()
             db.refresh(session)
             return session
         finally:
             db.close()
 
-    def get_session(self, session_id: str) -> Optional[LearningSession]:
-        db = self.Session()
+    def get_session(self, session_id: str, fresh: bool = False) -> Optional[LearningSession]:
+        db = self._read_session(fresh)
         try:
             return db.query(LearningSession).filter_by(session_id=session_id).first()
         finally:
@@ -80,22 +213,251 @@ class SessionManager:
         finally:
             db.close()
 
-    def update_quiz_results(self, session_id: str, quiz_data: dict, score: int, total: int) -> None:
+    def save_quiz(self, session_id: str, quiz_data: dict) -> None:
         db = self.Session()
         try:
             session = db.query(LearningSession).filter_by(session_id=session_id).first()
             if session:
+                session.quiz_data = json.dumps(quiz_data)
+                db.commit()
+        finally:
+            db.close()
+
+    def get_quiz_data(self, session_id: str) -> Optional[dict]:
+        db = self.Session()
+        try:
+            row = db.query(LearningSession.quiz_data).filter_by(session_id=session_id).first()
+            return json.loads(row.quiz_data) if row and row.quiz_data else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _followup_dict(thread: Optional[FollowUpThread]) -> dict:
+        if not thread:
+            return {'summary': None, 'turns': [], 'compacted_turns': 0}
+        return {
+            'summary': thread.summary,
+            'turns': json.loads(thread.turns) if thread.turns else [],
+            'compacted_turns': thread.compacted_turns or 0,
+        }
+
+    def get_followup_thread(self, session_id: str) -> dict:
+        db = self.Session()
+        try:
+            return self._followup_dict(db.query(FollowUpThread).filter_by(session_id=session_id).first())
+        finally:
+            db.close()
+
+    def _lock_followup_thread(self, db, session_id: str) -> FollowUpThread:
+        """Lock (creating if needed) a session's thread row for the rest of the transaction."""
+        # Write first, so SQLite takes its write lock before the read below
+        touch = update(FollowUpThread).where(FollowUpThread.session_id == session_id).values(
+            updated_at=datetime.utcnow()
+        )
+        if not db.execute(touch).rowcount:
+            try:
+                with db.begin_nested():
+                    db.add(FollowUpThread(session_id=session_id, compacted_turns=0))
+            except IntegrityError:
+                # Another worker inserted the row first
+                db.execute(touch)
+        return db.query(FollowUpThread).filter_by(session_id=session_id).with_for_update().one()
+
+    def append_followup_exchange(self, session_id: str, question: str, answer: str) -> dict:
+        """Append one exchange to the stored thread and return the thread as committed."""
+        db = self.Session()
+        try:
+            thread = self._lock_followup_thread(db, session_id)
+            turns = json.loads(thread.turns) if thread.turns else []
+            thread.turns = json.dumps(turns + [
+                {"role": "user", "content": question},
+                {"role": "assistant", "content": answer},
+            ])
+            stored = self._followup_dict(thread)
+            db.commit()
+            return stored
+        finally:
+            db.close()
+
+    def compact_followup_thread(self, session_id: str, summary: str, folded_turns: int,
+                                compacted_turns: int) -> Optional[dict]:
+        """Replace the oldest `folded_turns` turns with `summary`.
+
+        `compacted_turns` is the count the summary was built on; if another
+        worker compacted in the meantime nothing changes and None is returned.
+        Turns appended since are kept.
+        """
+        db = self.Session()
+        try:
+            thread = self._lock_followup_thread(db, session_id)
+            if (thread.compacted_turns or 0) != compacted_turns:
+                db.rollback()
+                return None
+            turns = json.loads(thread.turns) if thread.turns else []
+            thread.summary = summary
+            thread.turns = json.dumps(turns[folded_turns:])
+            thread.compacted_turns = compacted_turns + folded_turns // 2
+            stored = self._followup_dict(thread)
+            db.commit()
+            return stored
+        finally:
+            db.close()
+
+    @staticmethod
+    def _lock_session(db, session_id: str) -> Optional[LearningSession]:
+        """Lock a session's row for the rest of the transaction; None if it doesn't exist."""
+        # SQLite ignores FOR UPDATE and reads outside a transaction; a write
+        # first takes its lock, so the read below sees every earlier commit
+        touch = update(LearningSession).where(LearningSession.session_id == session_id).values(
+            session_id=LearningSession.session_id
+        )
+        if not db.execute(touch).rowcount:
+            return None
+        return db.query(LearningSession).filter_by(session_id=session_id).with_for_update().one()
+
+    def record_quiz_results(self, session_id: str, results: list[dict]) -> None:
+        """Merge answers into the stored quiz; an already-recorded question keeps its first answer."""
+        db = self.Session()
+        try:
+            session = self._lock_session(db, session_id)
+            if not session or not session.quiz_data:
+                return
+            quiz_data = json.loads(session.quiz_data)
+            stored = quiz_data.setdefault('results', [])
+            answered = {r['question_id'] for r in stored}
+            new = [r for r in results if r['question_id'] not in answered]
+            if new:
+                stored.extend(new)
+                session.quiz_data = json.dumps(quiz_data)
+                db.commit()
+        finally:
+            db.close()
+
+    def update_quiz_results(self, session_id: str, quiz_data: dict, score: int, total: int) -> None:
+        db = self.Session()
+        try:
+            session = self._lock_session(db, session_id)
+            if session:
+                previous = json.loads(session.quiz_data) if session.quiz_data else {}
+                quiz_data = {**quiz_data, ROLLED_UP_KEY: previous.get(ROLLED_UP_KEY, [])}
+                self._roll_up_concepts(db, session.topic, session.difficulty, quiz_data)
                 session.quiz_data = json.dumps(quiz_data)
                 session.score = score
                 session.total_questions = total
                 session.percentage = (score / total * 100) if total > 0 else 0
-                session.completed_at = datetime.utcnow()
+                # Set once: it versions the insights ETag, so a repeat completion
+                # must not force a new insights generation
+                if session.completed_at is None:
+                    session.completed_at = datetime.utcnow()
+                self._bump_version(db)
                 db.commit()
         finally:
             db.close()
 
-    def get_history(self, limit: int = 20) -> list:
+    def _roll_up_concepts(self, db, topic: str, difficulty: str, quiz_data: dict) -> bool:
+        """Add results not yet counted to concept_stats and mark them in quiz_data.
+
+        Runs inside the caller's transaction, so the counts and the marker
+        commit together and re-completing a quiz never counts an answer twice.
+        """
+        counted = set(quiz_data.get(ROLLED_UP_KEY, []))
+        concepts = {q['id']: q.get('concept_tested') for q in quiz_data.get('questions', [])}
+        deltas = {}
+        for result in quiz_data.get('results', []):
+            if result['question_id'] in counted:
+                continue
+            concept = result.get('concept_tested') or concepts.get(result['question_id']) or 'General understanding'
+            delta = deltas.setdefault(canonical_topic(concept)[:256], {'concept': concept[:256], 'attempts': 0, 'misses': 0})
+            delta['attempts'] += 1
+            delta['misses'] += 0 if result['is_correct'] else 1
+            counted.add(result['question_id'])
+        if not deltas:
+            return False
+
+        topic_key, difficulty = canonical_topic(topic), difficulty or 'intermediate'
+        for concept_key, delta in deltas.items():
+            where = (ConceptStat.topic_key == topic_key, ConceptStat.difficulty == difficulty,
+                     ConceptStat.concept_key == concept_key)
+            increment = update(ConceptStat).where(*where).values(
+                attempts=ConceptStat.attempts + delta['attempts'],
+                misses=ConceptStat.misses + delta['misses'],
+                updated_at=datetime.utcnow()
+            )
+            if db.execute(increment).rowcount:
+                continue
+            try:
+                with db.begin_nested():
+                    db.add(ConceptStat(topic_key=topic_key, difficulty=difficulty, concept_key=concept_key,
+                                       topic=topic, **delta))
+            except IntegrityError:
+                # Another worker inserted the row first
+                db.execute(increment)
+        quiz_data[ROLLED_UP_KEY] = sorted(counted, key=str)
+        return True
+
+    def roll_up_session(self, session_id: str) -> bool:
+        """Count a completed session's results in concept_stats if they aren't yet; used by the backfill."""
+        db = self.Session()
+        try:
+            session = self._lock_session(db, session_id)
+            if not session or not session.completed_at or not session.quiz_data:
+                return False
+            quiz_data = json.loads(session.quiz_data)
+            if not self._roll_up_concepts(db, session.topic, session.difficulty, quiz_data):
+                return False
+            session.quiz_data = json.dumps(quiz_data)
+            self._bump_version(db)
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def get_completed_session_ids(self, after_id: int = 0, limit: int = 500) -> list[tuple[int, str]]:
+        """(id, session_id) of completed sessions in id order, for keyset-paginated jobs."""
         db = self.Session()
+        try:
+            rows = db.query(LearningSession.id, LearningSession.session_id).filter(
+                LearningSession.completed_at.isnot(None), LearningSession.id > after_id
+            ).order_by(LearningSession.id).limit(limit).all()
+            return [(row.id, row.session_id) for row in rows]
+        finally:
+            db.close()
+
+    def get_concept_stats(self, topic: str, difficulty: Optional[str] = None, limit: int = 10) -> list[dict]:
+        """Most-missed concepts for a topic, from the rollup; all difficulties combined if none given."""
+        db = self._read_session()
+        try:
+            query = db.query(ConceptStat).filter_by(topic_key=canonical_topic(topic))
+            if difficulty:
+                stats = [s.to_dict() for s in query.filter_by(difficulty=difficulty).all()]
+            else:
+                combined = {}
+                for stat in query.all():
+                    entry = combined.setdefault(stat.concept_key, {
+                        'topic': stat.topic, 'difficulty': None, 'concept': stat.concept, 'attempts': 0, 'misses': 0
+                    })
+                    entry['attempts'] += stat.attempts
+                    entry['misses'] += stat.misses
+                stats = list(combined.values())
+                for entry in stats:
+                    entry['miss_rate'] = round(entry['misses'] / entry['attempts'] * 100, 1) if entry['attempts'] else 0
+            stats.sort(key=lambda s: (s['misses'], s['miss_rate']), reverse=True)
+            return stats[:limit]
+        finally:
+            db.close()
+
+    def get_most_missed_concepts(self, limit: int = 5) -> list[dict]:
+        db = self._read_session()
+        try:
+            stats = db.query(ConceptStat).filter(ConceptStat.misses > 0).order_by(
+                ConceptStat.misses.desc(), ConceptStat.attempts
+            ).limit(limit).all()
+            return [s.to_dict() for s in stats]
+        finally:
+            db.close()
+
+    def get_history(self, limit: int = 20) -> list:
+        db = self._read_session()
         try:
             sessions = db.query(LearningSession).order_by(
                 LearningSession.created_at.desc()
@@ -104,8 +466,173 @@ class SessionManager:
         finally:
             db.close()
 
-    def get_stats(self) -> dict:
+    def iter_sessions(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                      include_content: bool = False, include_results: bool = False,
+                      chunk_size: int = 500) -> Iterator[dict]:
+        """Stream sessions oldest-first in chunks, without loading the table into memory.
+
+        Uses yield_per, which becomes a server-side cursor on databases that
+        support one; the DB session stays open until the iterator is exhausted
+        or closed.
+        """
+        columns = [
+            LearningSession.id, LearningSession.session_id, LearningSession.topic,
+            LearningSession.difficulty, LearningSession.score, LearningSession.total_questions,
+            LearningSession.percentage, LearningSession.created_at, LearningSession.completed_at
+        ]
+        if include_results:
+            columns.append(LearningSession.quiz_data)
+        if include_content:
+            columns.append(LearningSession.teaching_content)
+
+        db = self._read_session()
+        try:
+            query = db.query(*columns)
+            if since:
+                query = query.filter(LearningSession.created_at >= since)
+            if until:
+                query = query.filter(LearningSession.created_at < until)
+            for row in query.order_by(LearningSession.id).yield_per(chunk_size):
+                yield row._asdict()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _expired_filter(abandoned_before: Optional[datetime], completed_before: Optional[datetime]):
+        """Sessions never completed before `abandoned_before`, or created before `completed_before`."""
+        conditions = []
+        if abandoned_before:
+            conditions.append(and_(LearningSession.completed_at.is_(None),
+                                   LearningSession.created_at < abandoned_before))
+        if completed_before:
+            conditions.append(LearningSession.created_at < completed_before)
+        return or_(*conditions) if conditions else None
+
+    def get_expired_session_ids(self, abandoned_before: Optional[datetime],
+                                completed_before: Optional[datetime], limit: int = 500) -> list[int]:
+        condition = self._expired_filter(abandoned_before, completed_before)
+        if condition is None:
+            return []
+        db = self.Session()
+        try:
+            rows = db.query(LearningSession.id).filter(condition).order_by(
+                LearningSession.id
+            ).limit(limit).all()
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    def count_expired_sessions(self, abandoned_before: Optional[datetime],
+                               completed_before: Optional[datetime]) -> int:
+        condition = self._expired_filter(abandoned_before, completed_before)
+        if condition is None:
+            return 0
         db = self.Session()
+        try:
+            return db.query(LearningSession).filter(condition).count()
+        finally:
+            db.close()
+
+    def get_session_rows(self, ids: list[int]) -> list[dict]:
+        """Full rows, every column, for archiving; each with its follow-up thread row, if any."""
+        db = self.Session()
+        try:
+            sessions = db.query(LearningSession).filter(LearningSession.id.in_(ids)).order_by(
+                LearningSession.id
+            ).all()
+            threads = {
+                t.session_id: {c.name: getattr(t, c.name) for c in FollowUpThread.__table__.columns}
+                for t in db.query(FollowUpThread).filter(
+                    FollowUpThread.session_id.in_([s.session_id for s in sessions])
+                )
+            }
+            return [{**{c.name: getattr(s, c.name) for c in LearningSession.__table__.columns},
+                     'followup_thread': threads.get(s.session_id)}
+                    for s in sessions]
+        finally:
+            db.close()
+
+    def delete_sessions(self, ids: list[int], abandoned_before: Optional[datetime],
+                        completed_before: Optional[datetime]) -> int:
+        """Delete the given sessions that still match the expiry filter, with their follow-up threads.
+
+        A session completed since it was archived no longer matches and is kept.
+        """
+        condition = self._expired_filter(abandoned_before, completed_before)
+        if condition is None:
+            return 0
+        db = self.Session()
+        try:
+            expired = and_(LearningSession.id.in_(ids), condition)
+            db.execute(delete(FollowUpThread).where(FollowUpThread.session_id.in_(
+                select(LearningSession.session_id).where(expired)
+            )))
+            result = db.execute(delete(LearningSession).where(expired))
+            self._bump_version(db)
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def get_database_size(self) -> Optional[int]:
+        """Bytes on disk for the database and its WAL (SQLite) or the sessions table (PostgreSQL), if known."""
+        with self.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                path = conn.exec_driver_sql('PRAGMA database_list').fetchone()[2]
+                if not path:
+                    return None
+                return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+            if conn.dialect.name == 'postgresql':
+                return conn.exec_driver_sql(
+                    "SELECT pg_total_relation_size('learning_sessions')"
+                ).scalar()
+        return None
+
+    def get_free_pages(self) -> Optional[int]:
+        """Pages SQLite holds for reuse but has not returned to the OS."""
+        with self.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                return conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+        return None
+
+    def compact(self, full_vacuum: bool = False) -> None:
+        """Return freed space and refresh planner statistics after bulk deletes.
+
+        New SQLite files are created with incremental auto_vacuum (see
+        db_pool). full_vacuum rewrites the table/file and holds an exclusive
+        lock for the duration, so it is opt-in; on an older SQLite file
+        without auto_vacuum it also converts the file, so later runs can
+        free pages incrementally.
+        """
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            if conn.dialect.name == 'sqlite':
+                auto_vacuum = conn.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+                if full_vacuum:
+                    if auto_vacuum == 0:
+                        logger.info("Converting SQLite database to incremental auto_vacuum")
+                        conn.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+                    conn.exec_driver_sql('VACUUM')
+                elif auto_vacuum == 0:
+                    logger.info("auto_vacuum is off, so freed pages stay in the file for reuse; "
+                                "run once with --vacuum to convert the database")
+                elif auto_vacuum == 2:
+                    # execute() steps the pragma once, freeing a single page;
+                    # executescript() runs it to completion
+                    conn.connection.dbapi_connection.executescript('PRAGMA incremental_vacuum;')
+                # Copy the vacuumed pages into the main file and truncate the WAL
+                conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+                conn.exec_driver_sql('ANALYZE learning_sessions')
+            elif conn.dialect.name == 'postgresql':
+                conn.exec_driver_sql(
+                    'VACUUM (FULL, ANALYZE) learning_sessions' if full_vacuum
+                    else 'VACUUM (ANALYZE) learning_sessions'
+                )
+            elif conn.dialect.name in ('mysql', 'mariadb'):
+                conn.exec_driver_sql('ANALYZE TABLE learning_sessions')
+
+    def get_stats(self) -> dict:
+        db = self._read_session()
         try:
             total_sessions = db.query(LearningSession).count()
             completed = db.query(LearningSession).filter(
@@ -127,3 +654,46 @@ class SessionManager:
             }
         finally:
             db.close()
+
+    def get_popular_topics(self, limit: int = 100) -> list[tuple[str, str, int]]:
+        """Most requested (topic, difficulty) pairs, case-insensitive."""
+        db = self._read_session()
+        try:
+            count = func.count(LearningSession.id)
+            rows = db.query(
+                func.min(LearningSession.topic), LearningSession.difficulty, count
+            ).group_by(
+                func.lower(LearningSession.topic), LearningSession.difficulty
+            ).order_by(count.desc()).limit(limit).all()
+            return [(topic, difficulty, n) for topic, difficulty, n in rows]
+        finally:
+            db.close()
+
+    def get_cached_content(self, topic: str, difficulty: str) -> Optional[ContentCache]:
+        db = self._read_session()
+        try:
+            return db.query(ContentCache).filter_by(
+                topic_key=canonical_topic(topic), difficulty=difficulty
+            ).first()
+        finally:
+            db.close()
+
+    def store_cached_content(self, topic: str, difficulty: str,
+                             teaching_content: Optional[str] = None,
+                             quiz_data: Optional[str] = None) -> None:
+        db = self.Session()
+        try:
+            entry = db.query(ContentCache).filter_by(
+                topic_key=canonical_topic(topic), difficulty=difficulty
+            ).first()
+            if not entry:
+                entry = ContentCache(topic_key=canonical_topic(topic), topic=topic, difficulty=difficulty)
+                db.add(entry)
+            if teaching_content is not None:
+                entry.teaching_content = teaching_content
+                entry.quiz_data = None
+            if quiz_data is not None:
+                entry.quiz_data = quiz_data
+            db.commit()
+        finally:
+            db.close()
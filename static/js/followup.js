@@ -0,0 +1,113 @@
+/**
+ * Learnify - Follow-up Questions
+ *
+ * Streams answers to follow-up questions about the current lesson
+ */
+
+function appendExchange(thread, question) {
+    const questionEl = document.createElement('p');
+    questionEl.className = 'followup-question';
+    questionEl.textContent = question;
+
+    const answerEl = document.createElement('div');
+    answerEl.className = 'followup-answer markdown-body';
+
+    thread.appendChild(questionEl);
+    thread.appendChild(answerEl);
+    return answerEl;
+}
+
+async function loadFollowUpHistory(sessionId, thread) {
+    const response = await fetch(`/api/followup/${sessionId}`);
+    if (!response.ok) return;
+
+    const data = await response.json();
+    if (data.compacted_turns) {
+        const note = document.createElement('p');
+        note.className = 'followup-summary';
+        note.textContent = `${data.compacted_turns} earlier question${data.compacted_turns === 1 ? '' : 's'} summarized`;
+        thread.appendChild(note);
+    }
+    for (let i = 0; i + 1 < data.turns.length; i += 2) {
+        const answerEl = appendExchange(thread, data.turns[i].content);
+        answerEl.innerHTML = marked.parse(data.turns[i + 1].content);
+    }
+}
+
+async function askFollowUp(sessionId, question, answerEl) {
+    const response = await fetch(`/api/followup/${sessionId}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ question })
+    });
+
+    if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || 'Failed to get an answer');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let answer = '';
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+
+        for (const line of lines) {
+            if (!line.startsWith('data: ')) continue;
+            const data = JSON.parse(line.slice(6));
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            if (data.done) {
+                // The server may still be compacting history; the answer is complete
+                return;
+            }
+            if (data.content) {
+                answer += data.content;
+                answerEl.innerHTML = marked.parse(answer);
+            }
+        }
+    }
+}
+
+function initFollowUp(sessionId) {
+    const card = document.getElementById('followup-card');
+    const form = document.getElementById('followup-form');
+    const input = document.getElementById('followup-input');
+    const submit = document.getElementById('followup-submit');
+    const thread = document.getElementById('followup-thread');
+
+    card.classList.remove('hidden');
+    loadFollowUpHistory(sessionId, thread).catch((error) => {
+        console.error('Follow-up history error:', error);
+    });
+
+    form.addEventListener('submit', async (event) => {
+        event.preventDefault();
+        const question = input.value.trim();
+        if (!question) return;
+
+        input.value = '';
+        input.disabled = true;
+        submit.disabled = true;
+        const answerEl = appendExchange(thread, question);
+
+        try {
+            await askFollowUp(sessionId, question, answerEl);
+        } catch (error) {
+            console.error('Follow-up error:', error);
+            answerEl.textContent = error.message;
+        } finally {
+            input.disabled = false;
+            submit.disabled = false;
+            input.focus();
+        }
+    });
+}
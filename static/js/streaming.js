@@ -77,6 +77,7 @@ async function initTeaching(topic, difficulty) {
                             // Show quiz CTA
                             quizLink.href = `/quiz/${sessionId}`;
                             quizCta.classList.remove('hidden');
+                            initFollowUp(sessionId);
 
                             // Re-init icons
                             if (window.lucide) {
@@ -1,15 +1,25 @@
 """Teaching Agent for Learnify"""
 import logging
-from typing import Generator, Optional
-from claude_client import ClaudeClient
+from typing import TYPE_CHECKING, Generator, Optional
 from prompt_templates import TeachingPrompts
 
+if TYPE_CHECKING:
+    from claude_client import ClaudeClient
+
 logger = logging.getLogger(__name__)
 
 
 class TeachingAgent:
-    def __init__(self, claude_client: Optional[ClaudeClient] = None):
-        self.client = claude_client or ClaudeClient()
+    def __init__(self, claude_client: Optional["ClaudeClient"] = None):
+        self._client = claude_client
+
+    @property
+    def client(self) -> "ClaudeClient":
+        """The given client, or the shared lazily built one."""
+        if self._client is None:
+            from services import get_claude_client
+            self._client = get_claude_client()
+        return self._client
 
     def teach(self, topic: str, difficulty: str = "intermediate") -> Generator[str, None, None]:
         logger.info(f"Teaching topic: {topic} at {difficulty} level")
@@ -17,5 +27,12 @@ class TeachingAgent:
         user_prompt = TeachingPrompts.get_teaching_prompt(topic, difficulty)
         yield from self.client.stream_teaching_content(system_prompt, user_prompt)
 
+    def generate_lesson(self, topic: str, difficulty: str = "intermediate") -> str:
+        logger.info(f"Generating lesson: {topic} at {difficulty} level")
+        return self.client.generate_teaching_content(
+            TeachingPrompts.SYSTEM_PROMPT,
+            TeachingPrompts.get_teaching_prompt(topic, difficulty)
+        )
+
     def get_usage_stats(self) -> dict:
         return self.client.get_usage_stats()
@@ -0,0 +1,53 @@
+"""PDF rendering of lesson Markdown that mixes code spans and emphasis"""
+import pytest
+
+pytest.importorskip('reportlab')
+
+from pdf_export import PdfExporter, _inline, render_session_pdf  # noqa: E402
+
+TRICKY_LINES = [
+    "Use `a*b` and `c*d` to multiply.",
+    "**bold with `**` inside**",
+    "*italic `x*` then* more",
+    "**a *b** c*",
+    "Escaped <tags> & `<b>code</b>` stay literal",
+]
+
+
+def test_code_spans_are_not_emphasized():
+    assert _inline("Use `a*b` and `c*d`") == (
+        'Use <font face="Courier">a*b</font> and <font face="Courier">c*d</font>'
+    )
+    assert _inline("`<b>`") == '<font face="Courier">&lt;b&gt;</font>'
+
+
+@pytest.mark.parametrize('line', TRICKY_LINES)
+def test_tricky_markdown_renders(line):
+    pdf = render_session_pdf({
+        'topic': 'Markup',
+        'difficulty': 'beginner',
+        'teaching_content': f"# {line}\n\n{line}\n\n- {line}\n\n> {line}",
+        'quiz_data': {
+            'total': 1,
+            'questions': [{
+                'id': 1, 'question': line, 'concept_tested': line,
+                'options': [{'id': 'A', 'text': line, 'is_correct': True}],
+            }],
+            'results': [{'question_id': 1, 'selected_option_id': 'A', 'is_correct': True, 'feedback': line}],
+        },
+    })
+    assert pdf.startswith(b'%PDF')
+
+
+def test_exporter_recovers_from_a_dead_render_process(tmp_path):
+    exporter = PdfExporter(str(tmp_path), max_workers=1, timeout=60)
+    try:
+        exporter.get_pdf('s1', 'Topic', 'beginner', 'First lesson', None)
+        for process in list(exporter._pool._processes.values()):
+            process.kill()
+            process.join()
+        path = exporter.get_pdf('s1', 'Topic', 'beginner', 'Second lesson', None)
+        with open(path, 'rb') as f:
+            assert f.read().startswith(b'%PDF')
+    finally:
+        exporter.shutdown()
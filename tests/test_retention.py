@@ -0,0 +1,54 @@
+"""Retention archives everything it deletes"""
+import gzip
+import json
+
+import pytest
+
+from retention import run_retention
+from session_manager import SessionManager
+
+
+@pytest.fixture
+def session_manager(tmp_path):
+    manager = SessionManager(f"sqlite:///{tmp_path / 'learnify.db'}")
+    manager.create_schema()
+    yield manager
+    manager.engine.dispose()
+
+
+def _archived(report) -> list[dict]:
+    with gzip.open(report.archive_path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_followup_threads_are_archived_with_their_session(session_manager, tmp_path):
+    session_manager.create_session('s1', 'Photosynthesis')
+    session_manager.append_followup_exchange('s1', "What's a < b?", 'A comparison.')
+
+    report = run_retention(session_manager, str(tmp_path / 'archive'), abandoned_hours=None,
+                           retention_days=-1, pause=0)
+
+    assert report.rows_deleted == 1
+    (row,) = _archived(report)
+    assert row['session_id'] == 's1'
+    assert json.loads(row['followup_thread']['turns'])[0]['content'] == "What's a < b?"
+    assert session_manager.get_followup_thread('s1')['turns'] == []
+
+
+def test_session_completed_after_archiving_is_kept(session_manager, tmp_path, monkeypatch):
+    session_manager.create_session('s1', 'Photosynthesis')
+    session_manager.save_quiz('s1', {'questions': [], 'results': []})
+    get_session_rows = session_manager.get_session_rows
+
+    def complete_while_archiving(ids):
+        rows = get_session_rows(ids)
+        session_manager.update_quiz_results('s1', {'questions': [], 'results': []}, 0, 0)
+        return rows
+
+    monkeypatch.setattr(session_manager, 'get_session_rows', complete_while_archiving)
+    report = run_retention(session_manager, str(tmp_path / 'archive'), abandoned_hours=-1,
+                           retention_days=None, pause=0)
+
+    assert report.rows_archived == 1
+    assert report.rows_deleted == 0
+    assert session_manager.get_completed_at('s1') is not None
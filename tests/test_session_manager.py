@@ -0,0 +1,109 @@
+"""SessionManager writes that must stay correct when workers race on one session"""
+import sqlite3
+import threading
+
+import pytest
+
+from session_manager import ConceptStat, SessionManager
+
+WORKERS = 8
+
+
+def _quiz(num_questions: int) -> dict:
+    return {
+        'questions': [{'id': n, 'question': f"Q{n}", 'concept_tested': f"Concept {n}"}
+                      for n in range(1, num_questions + 1)],
+        'results': [],
+    }
+
+
+def _result(question_id: int, is_correct: bool = False) -> dict:
+    return {'question_id': question_id, 'selected_option_id': 'A', 'is_correct': is_correct,
+            'concept_tested': f"Concept {question_id}"}
+
+
+def _race(target, args_list) -> None:
+    barrier = threading.Barrier(len(args_list))
+    errors = []
+
+    def run(*args):
+        barrier.wait()
+        try:
+            target(*args)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=args) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+@pytest.fixture
+def session_manager(tmp_path):
+    manager = SessionManager(f"sqlite:///{tmp_path / 'learnify.db'}")
+    manager.create_schema()
+    yield manager
+    manager.engine.dispose()
+
+
+def _start_quiz(session_manager, num_questions: int) -> None:
+    session_manager.create_session('s1', 'Photosynthesis', 'beginner')
+    session_manager.save_quiz('s1', _quiz(num_questions))
+
+
+def test_concurrent_answers_are_all_recorded(session_manager):
+    _start_quiz(session_manager, 20)
+    _race(session_manager.record_quiz_results, [('s1', [_result(n)]) for n in range(1, 21)])
+
+    stored = session_manager.get_quiz_data('s1')
+    assert sorted(r['question_id'] for r in stored['results']) == list(range(1, 21))
+
+
+def test_concurrent_completions_roll_up_once(session_manager):
+    _start_quiz(session_manager, 4)
+    quiz_data = {**_quiz(4), 'results': [_result(n) for n in range(1, 5)]}
+    _race(session_manager.update_quiz_results, [('s1', quiz_data, 0, 4)] * WORKERS)
+    _race(session_manager.roll_up_session, [('s1',)] * WORKERS)
+
+    db = session_manager.Session()
+    try:
+        stats = db.query(ConceptStat).all()
+        assert sum(s.attempts for s in stats) == 4
+        assert sum(s.misses for s in stats) == 4
+    finally:
+        db.close()
+
+
+def test_compact_converts_old_sqlite_files_only_on_full_vacuum(tmp_path):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE placeholder (id INTEGER)')
+    conn.commit()
+    conn.close()
+    manager = SessionManager(f"sqlite:///{path}")
+    manager.create_schema()
+    try:
+        def auto_vacuum():
+            with manager.engine.connect() as conn:
+                return conn.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+
+        manager.compact()
+        assert auto_vacuum() == 0
+        manager.compact(full_vacuum=True)
+        assert auto_vacuum() == 2
+    finally:
+        manager.engine.dispose()
+
+
+def test_repeat_completion_keeps_completed_at(session_manager):
+    _start_quiz(session_manager, 1)
+    quiz_data = {**_quiz(1), 'results': [_result(1, is_correct=True)]}
+    session_manager.update_quiz_results('s1', quiz_data, 1, 1)
+    completed_at = session_manager.get_completed_at('s1')
+
+    session_manager.update_quiz_results('s1', quiz_data, 1, 1)
+
+    assert session_manager.get_completed_at('s1') == completed_at
@@ -0,0 +1,222 @@
+"""Offline cache warmer for Learnify
+
+Pre-generates lessons and quizzes for known topics into the content cache,
+so learners starting one of those topics skip the model round trip.
+
+    python warm_cache.py --topics-file topics.txt --difficulty beginner intermediate
+    python warm_cache.py --top 200 --workers 8
+    python warm_cache.py --topic "Recursion" --base-url http://127.0.0.1:8089
+
+Runs are resumable: topics already in the cache are skipped unless --force
+is given, and a lesson is stored before its quiz is generated.
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import anthropic
+from claude_client import ClaudeClient
+from teaching_agent import TeachingAgent
+from quiz_manager import QuizManager
+from session_manager import SessionManager
+from security import sanitize_input, validate_topic, validate_difficulty
+
+logger = logging.getLogger('warm_cache')
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 529}
+
+
+class UpstreamThrottle:
+    """Shared back-off so one 429 pauses every worker, not just the one that saw it."""
+
+    def __init__(self, max_attempts: int = 6):
+        self.max_attempts = max_attempts
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait(self) -> None:
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                return float(response.headers.get('retry-after'))
+            except (TypeError, ValueError):
+                pass
+        return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+    def call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_attempts):
+            self._wait()
+            try:
+                return fn(*args, **kwargs)
+            except anthropic.APIStatusError as e:
+                if e.status_code not in RETRYABLE_STATUS or attempt == self.max_attempts - 1:
+                    raise
+                delay = self._retry_delay(e, attempt)
+            except anthropic.APIConnectionError as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = self._retry_delay(e, attempt)
+            logger.warning(f"Upstream busy, backing off {delay:.1f}s (attempt {attempt + 1})")
+            self._pause(delay)
+
+
+@dataclass
+class WarmStats:
+    warmed: int = 0
+    skipped: int = 0
+    failed: list = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, outcome: str, job: tuple) -> None:
+        with self._lock:
+            if outcome == 'warmed':
+                self.warmed += 1
+            elif outcome == 'skipped':
+                self.skipped += 1
+            else:
+                self.failed.append(job)
+
+
+class CacheWarmer:
+    def __init__(self, claude_client: ClaudeClient, session_manager: SessionManager,
+                 num_questions: int = 4, with_quiz: bool = True, force: bool = False):
+        self.client = claude_client
+        self.teaching_agent = TeachingAgent(claude_client)
+        self.quiz_manager = QuizManager(claude_client)
+        self.session_manager = session_manager
+        self.num_questions = num_questions
+        self.with_quiz = with_quiz
+        self.force = force
+        self.throttle = UpstreamThrottle()
+
+    def warm(self, topic: str, difficulty: str) -> str:
+        entry = None if self.force else self.session_manager.get_cached_content(topic, difficulty)
+        content = entry.teaching_content if entry else None
+        if content and (entry.quiz_data or not self.with_quiz):
+            return 'skipped'
+
+        if not content:
+            content = self.throttle.call(self.teaching_agent.generate_lesson, topic, difficulty)
+            self.session_manager.store_cached_content(topic, difficulty, teaching_content=content)
+
+        if self.with_quiz:
+            quiz = self.throttle.call(
+                self.quiz_manager.generate_quiz, topic, content,
+                num_questions=self.num_questions, difficulty=difficulty
+            )
+            quiz_json = json.dumps({'questions': quiz.to_dict()['questions']})
+            self.session_manager.store_cached_content(topic, difficulty, quiz_data=quiz_json)
+        return 'warmed'
+
+    def run(self, jobs: list[tuple[str, str]], workers: int = 4) -> WarmStats:
+        stats = WarmStats()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.warm, topic, difficulty): (topic, difficulty)
+                       for topic, difficulty in jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to warm {job[0]!r} ({job[1]}): {e}")
+                    outcome = 'failed'
+                stats.record(outcome, job)
+                logger.info(f"[{done}/{len(jobs)}] {outcome}: {job[0]} ({job[1]})")
+        return stats
+
+
+def load_jobs(args, session_manager: SessionManager) -> list[tuple[str, str]]:
+    topics = list(args.topic or [])
+    if args.topics_file:
+        with open(args.topics_file, encoding='utf-8') as f:
+            topics.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    jobs = []
+    for raw in topics:
+        topic = sanitize_input(raw)
+        valid, error = validate_topic(topic)
+        if not valid:
+            logger.warning(f"Skipping {raw!r}: {error}")
+            continue
+        jobs.extend((topic, difficulty) for difficulty in args.difficulty)
+
+    if args.top:
+        jobs.extend((topic, difficulty) for topic, difficulty, _ in
+                    session_manager.get_popular_topics(limit=args.top))
+
+    seen = set()
+    unique = []
+    for topic, difficulty in jobs:
+        key = (topic.lower(), difficulty)
+        if key not in seen:
+            seen.add(key)
+            unique.append((topic, difficulty))
+    return unique
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Pre-generate Learnify lessons and quizzes.')
+    parser.add_argument('--topic', action='append', help='Topic to warm (repeatable)')
+    parser.add_argument('--topics-file', help='File with one topic per line')
+    parser.add_argument('--top', type=int, default=0, help='Also warm the N most requested topics')
+    parser.add_argument('--difficulty', nargs='+', default=['intermediate'],
+                        help='Difficulty levels for --topic/--topics-file entries')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent upstream calls')
+    parser.add_argument('--questions', type=int, default=4, help='Questions per quiz')
+    parser.add_argument('--no-quiz', action='store_true', help='Only generate lessons')
+    parser.add_argument('--force', action='store_true', help='Regenerate cached entries')
+    parser.add_argument('--base-url', help='Messages API base URL (e.g. a local fake server)')
+    parser.add_argument('--database-url', help='Override DATABASE_URL')
+    parser.add_argument('--input-cost', type=float, default=3.0, help='USD per million input tokens')
+    parser.add_argument('--output-cost', type=float, default=15.0, help='USD per million output tokens')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    for difficulty in args.difficulty:
+        valid, error = validate_difficulty(difficulty)
+        if not valid:
+            parser.error(error)
+
+    session_manager = SessionManager(args.database_url)
+    session_manager.create_schema()
+    jobs = load_jobs(args, session_manager)
+    if not jobs:
+        parser.error('No topics to warm; pass --topic, --topics-file or --top')
+
+    warmer = CacheWarmer(
+        # UpstreamThrottle owns retries; SDK retries would multiply its attempts
+        ClaudeClient(base_url=args.base_url, max_retries=0), session_manager,
+        num_questions=args.questions, with_quiz=not args.no_quiz, force=args.force
+    )
+    started = time.monotonic()
+    stats = warmer.run(jobs, workers=args.workers)
+    elapsed = time.monotonic() - started
+
+    usage = warmer.client.get_usage_stats()
+    cost = (usage['input_tokens'] * args.input_cost + usage['output_tokens'] * args.output_cost) / 1_000_000
+    print(f"Warmed {stats.warmed}, skipped {stats.skipped}, failed {len(stats.failed)} "
+          f"of {len(jobs)} in {elapsed:.1f}s ({stats.warmed / elapsed if elapsed else 0:.2f} topics/s)")
+    print(f"Tokens: {usage['input_tokens']} in, {usage['output_tokens']} out (~${cost:.2f})")
+    for topic, difficulty in stats.failed:
+        print(f"  failed: {topic} ({difficulty})")
+    return 1 if stats.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())